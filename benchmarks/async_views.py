@@ -0,0 +1,110 @@
+"""
+Load comparison: sync DRF game views vs the async-native ones under ASGI
+
+Usage:
+    python benchmarks/async_views.py [--clients 50] [--requests 20] [--entries 5000]
+
+Every request goes through Django's ASGI handler in-process, the same path a
+uvicorn/daphne worker uses, against a throwaway SQLite file, cache directory
+and metrics directory (removed afterwards). Each of
+--clients concurrent clients fetches a game and submits its answers
+--requests times.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'simsim.settings')
+
+import django
+from django.conf import settings
+
+# Version bumps, decks, sessions and metrics stay out of the live server's cache and metrics
+WORKDIR = tempfile.mkdtemp(prefix='simsim-benchmark-')
+settings.DATABASES['default']['NAME'] = os.path.join(WORKDIR, 'bench.sqlite3')
+settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+settings.DATABASE_READ_ALIAS = 'default'
+settings.CACHES['default']['LOCATION'] = os.path.join(WORKDIR, 'cache')
+settings.METRICS_DIR = os.path.join(WORKDIR, 'metrics')
+django.setup()
+
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from core.models import VocabularyEntry
+
+settings.GAME_API_ASYNC = False
+ROUTES = {
+    'sync': (reverse('game-vocabulary'), reverse('submit-game')),
+    'async': (reverse('game-vocabulary-async'), reverse('submit-game-async')),
+}
+
+
+async def run_client(client, routes, rounds, latencies):
+    vocabulary_url, submit_url = routes
+    for _ in range(rounds):
+        start = time.perf_counter()
+        game = (await client.get(vocabulary_url, {'N': 5})).json()
+        latencies['get'].append(time.perf_counter() - start)
+
+        answers = [
+            {'concept': q['concept'], 'selected_text': q['options'][0]['text'],
+             'is_correct': q['options'][0]['id'] == q['answer'], 'response_time_ms': 800}
+            for q in game['questions']
+        ]
+        start = time.perf_counter()
+        await client.post(submit_url, {'session_id': game['session_id'], 'responses': answers},
+                          content_type='application/json')
+        latencies['submit'].append(time.perf_counter() - start)
+
+
+async def run(mode, clients, rounds):
+    latencies = {'get': [], 'submit': []}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(AsyncClient(), ROUTES[mode], rounds, latencies) for _ in range(clients)
+    ))
+    return time.perf_counter() - start, latencies
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100)[pct - 1] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--entries', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    VocabularyEntry.objects.bulk_create(
+        VocabularyEntry(concept=f'concept{i}', arabic_text=f'عربي{i}', hebrew_text=f'עברית{i}')
+        for i in range(args.entries)
+    )
+
+    print(f"{args.clients} clients x {args.requests} games, {args.entries} entries")
+    print(f"{'mode':>6} {'games/s':>9} {'get p50':>9} {'get p95':>9} {'submit p50':>11} {'submit p95':>11}")
+    for mode in ('sync', 'async'):
+        elapsed, latencies = asyncio.run(run(mode, args.clients, args.requests))
+        print(
+            f"{mode:>6} {args.clients * args.requests / elapsed:>9.1f} "
+            f"{percentile(latencies['get'], 50):>7.1f}ms {percentile(latencies['get'], 95):>7.1f}ms "
+            f"{percentile(latencies['submit'], 50):>9.1f}ms {percentile(latencies['submit'], 95):>9.1f}ms"
+        )
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
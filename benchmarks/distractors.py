@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: distractor selection with DistractorIndex vs the per-question table scan
+
+Usage:
+    python benchmarks/distractors.py [--sizes 1000 10000 100000] [--questions 20]
+
+Runs against a throwaway in-memory SQLite database and a temporary cache and
+metrics directory (removed afterwards); the project database, the shared
+cache and the live server's metrics are never touched.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'simsim.settings')
+
+import django
+from django.conf import settings
+
+settings.DATABASES['default']['NAME'] = ':memory:'
+# seed() deletes entries, and every post_delete bumps the vocabulary version in the cache
+WORKDIR = tempfile.mkdtemp(prefix='simsim-benchmark-')
+settings.CACHES['default']['LOCATION'] = os.path.join(WORKDIR, 'cache')
+settings.METRICS_DIR = os.path.join(WORKDIR, 'metrics')
+django.setup()
+
+from django.core.management import call_command
+from core.distractors import DistractorIndex
+from core.models import VocabularyEntry
+from core.snapshot import VocabularySnapshot
+
+
+def seed(size):
+    VocabularyEntry.objects.all().delete()
+    VocabularyEntry.objects.bulk_create(
+        (
+            VocabularyEntry(
+                concept=f'concept{i}',
+                arabic_text='ع' * random.randint(2, 9) + str(i),
+                hebrew_text='ע' * random.randint(2, 9) + str(i),
+            )
+            for i in range(size)
+        ),
+        batch_size=5000,
+    )
+
+
+def legacy_pick(entry, answer_lang):
+    """The pre-index path: one full table read per question"""
+    other_answers = [
+        e.arabic_text if answer_lang == 'ar' else e.hebrew_text
+        for e in VocabularyEntry.objects.exclude(id=entry.id)
+    ]
+    return random.sample(other_answers, min(3, len(other_answers)))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--questions', type=int, default=20)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+
+    print(f"{'entries':>8} {'legacy/q':>12} {'index build':>12} {'index/q':>12} {'speedup':>10}")
+    for size in args.sizes:
+        seed(size)
+        snapshot = VocabularySnapshot.load(version=0)
+        entries = random.sample(snapshot.entries, min(args.questions, size))
+
+        legacy = timed(lambda: [legacy_pick(e, 'ar') for e in entries], 1) / len(entries)
+        build = timed(lambda: DistractorIndex(snapshot.entries), 1)
+        index = snapshot.distractors
+        indexed = timed(lambda: [index.pick(e, 'ar', 3) for e in entries], 200) / len(entries)
+
+        print(
+            f"{size:>8} {legacy * 1e3:>10.3f}ms {build * 1e3:>10.1f}ms "
+            f"{indexed * 1e6:>10.2f}us {legacy / indexed:>9.0f}x"
+        )
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
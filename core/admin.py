@@ -1,14 +1,28 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import VocabularyEntry, Vocabulary, GameSession, GameResponse
+from .models import VocabularyEntry, Vocabulary, GameSession, GameResponse, ConceptDailyStats
 from django import forms
-from django.core.exceptions import ValidationError
 from django.shortcuts import render, redirect
 from django.urls import path
-from django.http import HttpResponse
-from django.db import transaction
-import csv
 from io import TextIOWrapper
+from .exports import stream_csv, csv_export_action
+from .importers import VocabularyImporter
+from .rollups import summarize
+from .routers import read_database, read_replica
+
+
+class ReadReplicaChangelistMixin:
+    """Serve changelist pages from the read database; actions (POST) stay on the primary"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with read_replica():
+            response = super().changelist_view(request, extra_context)
+            # The result list is only queried while the template renders
+            if hasattr(response, 'render'):
+                response.render()
+        return response
 
 
 class VocabularyInline(admin.TabularInline):
@@ -31,7 +45,7 @@ class CsvImportForm(forms.Form):
 
 
 @admin.register(VocabularyEntry)
-class VocabularyEntryAdmin(admin.ModelAdmin):
+class VocabularyEntryAdmin(ReadReplicaChangelistMixin, admin.ModelAdmin):
     list_display = ('concept', 'arabic_text', 'hebrew_text', 'hint')
     search_fields = ('concept', 'arabic_text', 'hebrew_text')
     list_filter = ('created_at',)
@@ -42,92 +56,29 @@ class VocabularyEntryAdmin(admin.ModelAdmin):
     def get_urls(self):
         urls = super().get_urls()
         my_urls = [
-            path('import-csv/', self.import_csv),
-            path('export-csv/', self.export_csv),
+            path('import-csv/', self.admin_site.admin_view(self.import_csv)),
+            path('export-csv/', self.admin_site.admin_view(self.export_csv)),
         ]
         return my_urls + urls
 
     def import_csv(self, request):
         if request.method == "POST":
             csv_file = TextIOWrapper(request.FILES['csv_file'].file, encoding='utf-8')
-            reader = csv.DictReader(csv_file)
-
-            created = updated = errors = 0
-            error_messages = []
-
-            with transaction.atomic():
-                for row_num, row in enumerate(reader, start=1):
-                    try:
-                        # Create Arabic entry
-                        ar_obj, ar_created = Vocabulary.objects.update_or_create(
-                            concept=row['concept'],
-                            language='ar',
-                            defaults={
-                                'text': row['arabic_word__text'],
-                                'hint': row['hint'],
-                                'is_correct': True
-                            }
-                        )
-
-                        # Create Hebrew entry with validation
-                        he_obj, he_created = Vocabulary.objects.update_or_create(
-                            concept=row['concept'],
-                            language='he',
-                            defaults={
-                                'text': row['hebrew_word__text'],
-                                'hint': row['hint'],
-                                'is_correct': True
-                            }
-                        )
-                        he_obj.full_clean()  # Explicit validation
-
-                        # Create English entry
-                        en_obj, en_created = Vocabulary.objects.update_or_create(
-                            concept=row['concept'],
-                            language='en',
-                            defaults={
-                                'text': row['concept'],
-                                'hint': row['hint'],
-                                'is_correct': False
-                            }
-                        )
-
-                        if ar_created:
-                            created += 1
-                        else:
-                            updated += 1
-                        if he_created:
-                            created += 1
-                        else:
-                            updated += 1
-                        if en_created:
-                            created += 1
-                        else:
-                            updated += 1
-
-                    except ValidationError as e:
-                        errors += 1
-                        error_messages.append(
-                            f"Row {row_num} ({row['concept']}): {', '.join(e.messages)}"
-                        )
-                    except Exception as e:
-                        errors += 1
-                        error_messages.append(
-                            f"Row {row_num} ({row['concept']}): {str(e)}"
-                        )
-
-            if errors:
+            result = VocabularyImporter().run(csv_file)
+
+            if result.errors:
                 self.message_user(
                     request,
-                    f"Completed with {errors} errors. Imported {created} new and updated {updated} existing entries",
+                    f"Completed with {len(result.errors)} errors. "
+                    f"Imported {result.created} new and updated {result.updated} existing entries",
                     level='ERROR'
                 )
-                for msg in error_messages[:10]:  # Show first 10 errors
-                    self.message_user(request, msg, level='ERROR')
+                for row_num, concept, message in result.errors[:10]:  # Show first 10 errors
+                    self.message_user(request, f"Row {row_num} ({concept}): {message}", level='ERROR')
             else:
                 self.message_user(
                     request,
-                    f"Successfully imported {created} new and updated {updated} existing entries"
+                    f"Successfully imported {result.created} new and updated {result.updated} existing entries"
                 )
 
             return redirect("..")
@@ -139,28 +90,24 @@ class VocabularyEntryAdmin(admin.ModelAdmin):
         )
 
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="vocabulary_export.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['concept', 'hint', 'arabic_word__text', 'hebrew_word__text'])
-
-        for entry in VocabularyEntry.objects.all():
-            writer.writerow([
-                entry.concept,
-                entry.hint,
-                entry.arabic_text,
-                entry.hebrew_text
-            ])
-
-        return response
+        # Apply the changelist filters and search the export link was opened with
+        queryset = self.get_changelist_instance(request).get_queryset(request).using(read_database())
+        return stream_csv(
+            queryset,
+            ['concept', 'hint', 'arabic_text', 'hebrew_text'],
+            'vocabulary_export.csv',
+            header=['concept', 'hint', 'arabic_word__text', 'hebrew_word__text']
+        )
 
 @admin.register(Vocabulary)
-class VocabularyAdmin(admin.ModelAdmin):
+class VocabularyAdmin(ReadReplicaChangelistMixin, admin.ModelAdmin):
     list_display = ('text', 'language', 'is_correct', 'styled_preview')
     list_filter = ('language', 'is_correct')
     search_fields = ('text',)
     list_editable = ('is_correct',)
+    actions = [csv_export_action(
+        ['concept', 'language', 'text', 'hint', 'is_correct'], 'vocabulary_translations.csv'
+    )]
 
     def styled_preview(self, obj):
         if obj.language == 'he':
@@ -185,39 +132,67 @@ class GameResponseInline(admin.TabularInline):
 
 
 @admin.register(GameSession)
-class GameSessionAdmin(admin.ModelAdmin):
-    list_display = ('session_id', 'created_at', 'language_preference', 'response_count')
+class GameSessionAdmin(ReadReplicaChangelistMixin, admin.ModelAdmin):
+    list_display = ('session_id', 'created_at', 'language_preference', 'response_count', 'correct_count',
+                    'last_activity_at')
     list_filter = ('language_preference', 'created_at')
     search_fields = ('session_id', 'device_id')
+    readonly_fields = ('response_count', 'correct_count', 'total_response_time_ms', 'min_response_time_ms',
+                       'max_response_time_ms', 'last_activity_at', 'archived_response_count',
+                       'archived_correct_count', 'archived_response_time_ms')
     inlines = [GameResponseInline]
 
-    def response_count(self, obj):
-        return obj.responses.count()
-
-    response_count.short_description = "Answers"
-
 
 @admin.register(GameResponse)
-class GameResponseAdmin(admin.ModelAdmin):
-    list_display = ('session', 'entry_display', 'selected_word_display', 'is_correct', 'response_time')
+class GameResponseAdmin(ReadReplicaChangelistMixin, admin.ModelAdmin):
+    list_display = ('session', 'concept', 'selected_text', 'is_correct', 'response_time')
     list_filter = ('is_correct', 'submitted_at')
     readonly_fields = ('submitted_at',)
+    actions = [csv_export_action(
+        ['session__session_id', 'concept', 'selected_text', 'is_correct', 'response_time_ms', 'submitted_at'],
+        'game_responses.csv',
+        header=['session_id', 'concept', 'selected_text', 'is_correct', 'response_time_ms', 'submitted_at']
+    )]
 
-    def entry_display(self, obj):
-        return obj.entry.arabic_text
+    def response_time(self, obj):
+        return f"{obj.response_time_ms}ms"
 
-    entry_display.short_description = "Arabic Word"
+    response_time.short_description = "Time"
 
-    def selected_word_display(self, obj):
-        lang = obj.selected_word.get_language_display()
-        return f"[{lang}] {obj.selected_word.text}"
 
-    selected_word_display.short_description = "Selected Answer"
+@admin.register(ConceptDailyStats)
+class ConceptDailyStatsAdmin(ReadReplicaChangelistMixin, admin.ModelAdmin):
+    list_display = ('concept', 'language', 'day', 'response_count', 'correct_ratio', 'mean_time', 'p50_time',
+                    'p90_time')
+    list_filter = ('language', 'day')
+    search_fields = ('concept',)
+    date_hierarchy = 'day'
 
-    def response_time(self, obj):
-        return f"{obj.response_time_ms}ms"
+    def has_add_permission(self, request):
+        return False
 
-    response_time.short_description = "Time"
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def _summary(self, obj):
+        return summarize(obj.response_count, obj.correct_count, obj.total_response_time_ms, obj.time_histogram)
+
+    def correct_ratio(self, obj):
+        return self._summary(obj)['correct_ratio']
+
+    def mean_time(self, obj):
+        return f"{self._summary(obj)['mean_response_time_ms']}ms"
+
+    def p50_time(self, obj):
+        return f"{self._summary(obj)['p50_response_time_ms']}ms"
+
+    def p90_time(self, obj):
+        return f"{self._summary(obj)['p90_response_time_ms']}ms"
+
+    correct_ratio.short_description = "Correct"
+    mean_time.short_description = "Mean time"
+    p50_time.short_description = "p50"
+    p90_time.short_description = "p90"
 
 
 admin.site.site_header = "Vocabulary Learning Admin"
@@ -0,0 +1,239 @@
+"""
+Archival of old GameResponse rows to gzip-compressed monthly files
+
+Responses older than a cutoff are read in id order, appended to one file per
+month (responses-YYYY-MM.ndjson.gz or .csv.gz, by UTC submission time) and
+only then deleted, one bounded chunk per transaction. Every chunk is written
+as its own gzip member, so a run that dies half-way leaves readable files;
+rows archived but not yet deleted are simply archived again on the next run
+and load_archive() skips the duplicates by id.
+
+Rows the concept rollups have not processed yet are left alone. The
+GameSession counters keep counting archived answers, and the archived part
+is recorded on the session (archived_response_count and friends) in the
+transaction that deletes the rows, so repair_session_counters adds it back
+and purge_sessions never mistakes an archived session for an abandoned one.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from collections import namedtuple
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.dateparse import parse_datetime
+
+from .models import GameResponse, GameSession, RollupCheckpoint
+from .rollups import CHECKPOINT_NAME
+
+FORMATS = ('ndjson', 'csv')
+
+ARCHIVE_FIELDS = [
+    'id', 'session_id', 'language', 'concept', 'selected_text', 'is_correct', 'response_time_ms', 'submitted_at',
+]
+
+ArchiveResult = namedtuple('ArchiveResult', ['archived', 'deleted', 'files'])
+
+
+def partition_path(directory, month, fmt):
+    return os.path.join(directory, f'responses-{month}.{fmt}.gz')
+
+
+def _serialize(rows, fmt, header):
+    """Encode archive records as NDJSON lines or CSV rows"""
+    if fmt == 'ndjson':
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ARCHIVE_FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _write_partitions(records, directory, fmt):
+    """Append records to their monthly files, each file as one new gzip member"""
+    by_month = {}
+    for record in records:
+        by_month.setdefault(record['submitted_at'][:7], []).append(record)
+
+    paths = []
+    for month, month_records in sorted(by_month.items()):
+        path = partition_path(directory, month, fmt)
+        header = not os.path.exists(path)
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                gz.write(_serialize(month_records, fmt, header).encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.append(path)
+    return paths
+
+
+def _record_archived(responses):
+    """Add the answers about to be deleted to their sessions' archived totals"""
+    totals = (
+        responses.values('session')
+        .annotate(count=Count('id'), correct=Count('id', filter=Q(is_correct=True)), time=Sum('response_time_ms'))
+        .order_by()
+    )
+    for row in totals:
+        GameSession.objects.filter(pk=row['session']).update(
+            archived_response_count=F('archived_response_count') + row['count'],
+            archived_correct_count=F('archived_correct_count') + row['correct'],
+            archived_response_time_ms=F('archived_response_time_ms') + row['time'],
+        )
+
+
+def _record_restored(rows):
+    """
+    Count reloaded answers as live again: out of the archived totals of the
+    sessions they were archived from, into the counters of sessions that
+    were recreated (or never counted them)
+    """
+    by_session = {}
+    for row in rows:
+        by_session.setdefault(row.session_id, []).append(row)
+    archived = dict(
+        GameSession.objects.filter(pk__in=by_session).values_list('pk', 'archived_response_count')
+    )
+    for session_id, session_rows in by_session.items():
+        times = [row.response_time_ms for row in session_rows]
+        correct = sum(1 for row in session_rows if row.is_correct)
+        sessions = GameSession.objects.filter(pk=session_id)
+        if archived[session_id] >= len(times):
+            sessions.update(
+                archived_response_count=F('archived_response_count') - len(times),
+                archived_correct_count=Greatest(F('archived_correct_count') - correct, 0),
+                archived_response_time_ms=Greatest(F('archived_response_time_ms') - sum(times), 0),
+            )
+        else:
+            fastest, slowest = Value(min(times)), Value(max(times))
+            latest = Value(max(row.submitted_at for row in session_rows))
+            sessions.update(
+                response_count=F('response_count') + len(times),
+                correct_count=F('correct_count') + correct,
+                total_response_time_ms=F('total_response_time_ms') + sum(times),
+                min_response_time_ms=Least(Coalesce('min_response_time_ms', fastest), fastest),
+                max_response_time_ms=Greatest(Coalesce('max_response_time_ms', slowest), slowest),
+                last_activity_at=Greatest(Coalesce('last_activity_at', latest), latest),
+            )
+
+
+def archive_responses(before, directory, fmt='ndjson', chunk_size=5000, pause=0.0, max_chunks=None,
+                      ignore_rollups=False):
+    """
+    Move responses submitted before `before` into monthly archive files
+
+    Each chunk is fetched, written and fsync'ed, then deleted in a short
+    transaction of its own; `pause` seconds between chunks give concurrent
+    submits a chance at the write lock. Only rows up to the rollup
+    checkpoint are archived (none if the rollups never ran) unless
+    `ignore_rollups` is set. Returns an ArchiveResult.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown archive format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    os.makedirs(directory, exist_ok=True)
+
+    queryset = GameResponse.objects.filter(submitted_at__lt=before)
+    if not ignore_rollups:
+        # Never archive what the rollups still have to read
+        checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+        queryset = queryset.filter(id__lte=checkpoint.last_id if checkpoint is not None else 0)
+
+    archived = deleted = chunks = 0
+    files = set()
+    last_id = 0
+    while max_chunks is None or chunks < max_chunks:
+        rows = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'session__session_id', 'session__language_preference', 'concept',
+                         'selected_text', 'is_correct', 'response_time_ms', 'submitted_at')[:chunk_size]
+        )
+        if not rows:
+            break
+        records = [
+            dict(zip(ARCHIVE_FIELDS, row[:-1]), submitted_at=row[-1].astimezone(dt_timezone.utc).isoformat())
+            for row in rows
+        ]
+        files.update(_write_partitions(records, directory, fmt))
+
+        first_id, last_id = rows[0][0], rows[-1][0]
+        with transaction.atomic():
+            chunk = queryset.filter(id__gte=first_id, id__lte=last_id)
+            _record_archived(chunk)
+            count, _ = chunk.delete()
+
+        archived += len(rows)
+        deleted += count
+        chunks += 1
+        if pause:
+            time.sleep(pause)
+    return ArchiveResult(archived, deleted, sorted(files))
+
+
+def read_archive(path):
+    """Yield the records of an archive file as dicts with typed values"""
+    fmt = 'csv' if path.endswith('.csv.gz') else 'ndjson'
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        if fmt == 'ndjson':
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            # Appended CSV members repeat no header, so the first one applies to the whole file
+            records = csv.DictReader(f)
+        for record in records:
+            yield {
+                **record,
+                'id': int(record['id']),
+                'is_correct': record['is_correct'] in (True, 'True'),
+                'response_time_ms': int(record['response_time_ms']),
+                'submitted_at': parse_datetime(record['submitted_at']),
+            }
+
+
+def load_archive(path, chunk_size=5000):
+    """
+    Re-import an archive file into GameResponse, keeping the original ids
+
+    Sessions missing from the database are recreated from the archived
+    session_id and language. Rows whose id already exists are skipped, so a
+    file can be loaded twice, and restored rows leave their session's
+    archived totals. Returns the number of records read.
+    """
+    loaded = 0
+    records = read_archive(path)
+    while True:
+        chunk = [record for _, record in zip(range(chunk_size), records)]
+        if not chunk:
+            break
+
+        with transaction.atomic():
+            languages = {record['session_id']: record['language'] for record in chunk}
+            GameSession.objects.bulk_create(
+                [GameSession(session_id=sid, language_preference=lang) for sid, lang in languages.items()],
+                ignore_conflicts=True,
+            )
+            sessions = dict(GameSession.objects.filter(session_id__in=languages).values_list('session_id', 'id'))
+            rows = [
+                GameResponse(
+                    id=record['id'], session_id=sessions[record['session_id']], concept=record['concept'],
+                    selected_text=record['selected_text'], is_correct=record['is_correct'],
+                    response_time_ms=record['response_time_ms'], submitted_at=record['submitted_at'],
+                )
+                for record in chunk
+            ]
+            present = set(GameResponse.objects.filter(id__in=[row.id for row in rows]).values_list('id', flat=True))
+            GameResponse.objects.bulk_create(rows, ignore_conflicts=True)
+            _record_restored([row for row in rows if row.id not in present])
+            # submitted_at is auto_now_add, which bulk_create overwrites; put the archived times back
+            for row, record in zip(rows, chunk):
+                row.submitted_at = record['submitted_at']
+            GameResponse.objects.bulk_update(rows, ['submitted_at'])
+        loaded += len(chunk)
+    return loaded
@@ -0,0 +1,148 @@
+"""
+Async-native versions of the game API for the ASGI deployment
+
+They mirror GameVocabularyView and SubmitGameView but use the async ORM and
+cache APIs, so under ASGI they run on the event loop instead of being
+serialized through the thread-sensitive executor. Select them with
+GAME_API_ASYNC in settings, or call them on their own /async/ routes.
+Validation, question sources and response bodies come from core.game, which
+the sync views use as well; only the awaiting of I/O is written twice.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .decks import apop_deck
+from .game import (
+    GameRequestError, adaptive_questions, adaptive_selection_enabled, database_sample, decks_enabled,
+    distractor_pool_size, generate_session_id, parse_question_request, parse_submission, questions_response,
+    response_rows, sampled_questions, server_busy, signed_session_owner, signed_session_token, signed_sessions,
+    snapshot_enabled, snapshot_sample, write_behind_enabled, write_behind_timeout,
+)
+from .ingest import get_response_buffer, save_responses
+from .mastery import adaptive_enabled, aget_mastery, arecord_answers, mastery_session_id
+from .models import GameSession
+from .sampling import sample_entries
+from .snapshot import aget_snapshot, aget_vocabulary_version
+
+
+def _error(message, status=400, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def _request_error(e):
+    return JsonResponse(e.body(), status=e.status, headers=e.headers)
+
+
+class AsyncGameVocabularyView(View):
+    """
+    Async API endpoint to get vocabulary questions for the game
+    """
+
+    async def get(self, request):
+        try:
+            lang, n = parse_question_request(request.GET)
+            session_id = request.GET.get('session_id')
+
+            questions, source = await self._adaptive_questions(session_id, lang, n), 'adaptive'
+            if questions is None and decks_enabled():
+                questions, source = await apop_deck(await aget_vocabulary_version(), lang, n), 'deck'
+            if questions is None:
+                entries, distractors, available = await self._sample_entries(n)
+                questions, source = sampled_questions(entries, distractors, available, lang, n), 'sampled'
+
+            if signed_sessions():
+                session_id = signed_session_token(session_id, lang)
+            else:
+                session_id = (await self._get_or_create_session(session_id, lang)).session_id
+            return JsonResponse(questions_response(session_id, questions, source, lang))
+
+        except GameRequestError as e:
+            return _request_error(e)
+        except Exception as e:
+            return _error(str(e))
+
+    async def _adaptive_questions(self, session_id, lang, n):
+        """Return questions weighted towards the session's weak concepts, or None"""
+        if not adaptive_selection_enabled():
+            return None
+        mastery = await aget_mastery(mastery_session_id(session_id))
+        if not mastery:
+            return None
+        return adaptive_questions(await aget_snapshot(), mastery, lang, n)
+
+    async def _sample_entries(self, n):
+        """Return n random entries, a distractor index and the vocabulary size"""
+        if snapshot_enabled():
+            return snapshot_sample(await aget_snapshot(), n)
+        return database_sample(await sync_to_async(sample_entries)(n, extra=distractor_pool_size()))
+
+    async def _get_or_create_session(self, session_id, lang):
+        if session_id:
+            try:
+                return await GameSession.objects.aget(session_id=session_id)
+            except GameSession.DoesNotExist:
+                pass
+
+        return await GameSession.objects.acreate(
+            session_id=generate_session_id(),
+            language_preference=lang
+        )
+
+
+class AsyncSubmitGameView(View):
+    """
+    Async API endpoint to submit game responses
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token-less JSON API like the DRF views, which are CSRF exempt as well
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return _error('Invalid JSON body')
+        if not isinstance(data, dict):
+            return _error('Invalid JSON body')
+
+        try:
+            responses = parse_submission(data)
+            session = await self._get_session(data['session_id'])
+            rows = response_rows(session, responses)
+            if write_behind_enabled():
+                queued = await sync_to_async(get_response_buffer().offer, thread_sensitive=False)(
+                    rows, timeout=write_behind_timeout()
+                )
+                if not queued:
+                    raise server_busy()
+            else:
+                # Responses and session counters are written in one transaction
+                await sync_to_async(save_responses)(rows)
+            if adaptive_enabled():
+                await arecord_answers(session.session_id, responses)
+
+            return JsonResponse({'status': 'success'})
+
+        except GameRequestError as e:
+            return _request_error(e)
+        except GameSession.DoesNotExist:
+            return _error('Invalid session ID')
+        except Exception as e:
+            return _error(str(e))
+
+    async def _get_session(self, session_id):
+        if not signed_sessions():
+            return await GameSession.objects.aget(session_id=session_id)
+
+        session_id, lang = signed_session_owner(session_id)
+        session, _ = await GameSession.objects.aget_or_create(
+            session_id=session_id,
+            defaults={'language_preference': lang}
+        )
+        return session
@@ -0,0 +1,175 @@
+"""
+Latency and throughput benchmark of the game API
+
+Drives /api/game/vocabulary/ and /api/game/submit/ through the full Django
+request stack with concurrent in-process clients (one thread and one test
+Client each) against a throwaway database seeded with VocabularyEntry rows,
+and measures per-request latency and database queries. Used by the
+benchmark_game management command.
+"""
+import math
+import random
+import threading
+import time
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .caching import game_cache
+from .models import GameResponse, GameSession, VocabularyEntry
+from .snapshot import bump_vocabulary_version, clear_snapshot
+
+SEED_BATCH = 5000
+
+
+def seed_entries(count):
+    """Replace all game data with `count` entries of varied text lengths"""
+    GameResponse.objects.all().delete()
+    GameSession.objects.all().delete()
+    VocabularyEntry.objects.all().delete()
+    for start in range(0, count, SEED_BATCH):
+        VocabularyEntry.objects.bulk_create([
+            VocabularyEntry(
+                concept=f'concept-{i}',
+                arabic_text='ع' * (2 + i % 9) + str(i),
+                hebrew_text='ע' * (2 + i % 9) + str(i),
+            )
+            for i in range(start, min(start + SEED_BATCH, count))
+        ])
+    # bulk_create sends no signals
+    bump_vocabulary_version()
+    clear_snapshot()
+    game_cache.local.clear()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class _Recorder:
+    """Latency, query count and status of every request, shared by the client threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint, seconds, queries, ok):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append((seconds, queries, ok))
+
+
+def _timed(recorder, endpoint, send):
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+    if recorder is not None:
+        recorder.add(endpoint, elapsed, queries, response.status_code == 200)
+    return response
+
+
+def _client_loop(rounds, questions, recorder, errors):
+    client = Client()
+    vocabulary_url = reverse('game-vocabulary')
+    submit_url = reverse('submit-game')
+    try:
+        for _ in range(rounds):
+            game = _timed(recorder, 'vocabulary', lambda: client.get(vocabulary_url, {'N': questions}))
+            if game.status_code != 200:
+                continue
+            data = game.json()
+            answers = [
+                {
+                    'concept': question['concept'],
+                    'selected_text': question['options'][0]['text'],
+                    'is_correct': question['options'][0]['id'] == question['answer'],
+                    'response_time_ms': random.randint(300, 6000),
+                }
+                for question in data['questions']
+            ]
+            _timed(recorder, 'submit', lambda: client.post(
+                submit_url, {'session_id': data['session_id'], 'responses': answers}, content_type='application/json'
+            ))
+    except Exception as e:
+        # Reported at the end; the other clients keep going
+        errors.append(repr(e))
+    finally:
+        connection.close()
+
+
+def run_load(clients, rounds, questions=5, warmup=5):
+    """
+    Run `clients` concurrent clients for `rounds` get/submit rounds each
+
+    Returns ({endpoint: summary}, errors). Warm-up rounds (snapshot load,
+    first connections) run first on one client and are not recorded.
+    """
+    _client_loop(warmup, questions, None, [])
+
+    recorder = _Recorder()
+    errors = []
+    threads = [
+        threading.Thread(target=_client_loop, args=(rounds, questions, recorder, errors))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    results = {}
+    for endpoint, samples in recorder.samples.items():
+        latencies = [seconds * 1000 for seconds, _, _ in samples]
+        results[endpoint] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, _, ok in samples if not ok),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'throughput_rps': round(len(samples) / wall, 1),
+            'queries_per_request': round(sum(queries for _, queries, _ in samples) / len(samples), 2),
+        }
+    return results, errors
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions of `results` against `baseline` ({scenario: {endpoint: summary}})
+
+    A scenario regresses when p95 latency grows, or throughput drops, by
+    more than `threshold` (a fraction), or when it needs more queries per
+    request. Returns a list of human-readable findings.
+    """
+    findings = []
+    for scenario, endpoints in results.items():
+        for endpoint, current in endpoints.items():
+            base = baseline.get(scenario, {}).get(endpoint)
+            if not base:
+                continue
+            name = f'{scenario} {endpoint}'
+            if current['p95_ms'] > base['p95_ms'] * (1 + threshold):
+                findings.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+            if current['throughput_rps'] < base['throughput_rps'] * (1 - threshold):
+                findings.append(
+                    f"{name}: throughput {current['throughput_rps']}/s vs baseline {base['throughput_rps']}/s"
+                )
+            if current['queries_per_request'] > base['queries_per_request'] + 0.5:
+                findings.append(
+                    f"{name}: {current['queries_per_request']} queries/request "
+                    f"vs baseline {base['queries_per_request']}"
+                )
+    return findings
@@ -0,0 +1,260 @@
+"""
+Two-tier cache for game data
+
+A bounded, per-process LRU with short TTLs sits in front of the shared
+Django cache (CACHES['default'], file-based by default). Values live in
+version-keyed namespaces: bumping a namespace's version in the shared tier
+orphans every key written under the old one, in every process, once the
+locally cached version expires (GAME_CACHE_VERSION_TTL). get_or_set() lets
+one caller per key recompute a missing value while the others wait for it:
+threads of a process queue on a lock, other processes on a short lease in
+the shared tier.
+
+FileBasedCache implements add() as has_key() then set() and incr() as get()
+then set(), so neither is atomic between processes. atomic_add() and
+atomic_incr() make them so with an flock on a stripe file next to the cache
+directory; other backends already provide atomic add/incr (memcached,
+redis) or are private to the process (LocMemCache).
+"""
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.utils.connection import ConnectionProxy
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, fine for a single dev server
+    fcntl = None
+
+from .metrics import cache_operations
+
+MISSING = object()
+LOCK_STRIPES = 64
+
+
+@contextmanager
+def shared_lock(name, backend=shared_cache):
+    """Exclusive cross-process lock around a read-modify-write of a FileBasedCache key"""
+    if isinstance(backend, ConnectionProxy):
+        # django.core.cache.cache: check the backend it stands for in this thread
+        backend = backend._connections[backend._alias]
+    if fcntl is None or not isinstance(backend, FileBasedCache):
+        yield
+        return
+    directory = backend._dir.rstrip(os.sep) + '-locks'
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{zlib.crc32(name.encode()) % LOCK_STRIPES}.lock')
+    # flock() locks belong to the open file, so this also excludes other threads
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_add(key, value, timeout=DEFAULT_TIMEOUT, backend=shared_cache):
+    """cache.add() that at most one process can win"""
+    with shared_lock(key, backend):
+        return backend.add(key, value, timeout=timeout)
+
+
+def atomic_incr(key, delta=1, backend=shared_cache):
+    """cache.incr() that never loses a concurrent increment"""
+    with shared_lock(key, backend):
+        return backend.incr(key, delta)
+
+
+class LocalLRU:
+    """Thread-safe LRU of (expires_at, value) pairs"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    def __init__(self, backend=shared_cache, max_entries=None):
+        self.backend = backend
+        self.local = LocalLRU(max_entries or getattr(settings, 'GAME_CACHE_LOCAL_MAX_ENTRIES', 1000))
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._stats_lock = threading.Lock()
+        self._stats = dict.fromkeys(('local_hits', 'shared_hits', 'misses', 'computes', 'waits'), 0)
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+        cache_operations.inc(outcome=stat)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_ratio'] = round((lookups - stats['misses']) / lookups, 4) if lookups else None
+        stats['local_entries'] = len(self.local)
+        return stats
+
+    def clear(self):
+        """Empty both tiers (tests)"""
+        self.local.clear()
+        self.backend.clear()
+
+    # Namespace versions
+
+    def _version_key(self, namespace):
+        return f'core:{namespace}:version'
+
+    def version(self, namespace):
+        """Current version of a namespace, cached locally for GAME_CACHE_VERSION_TTL seconds"""
+        key = self._version_key(namespace)
+        version = self.local.get(key)
+        if version is MISSING:
+            version = self.backend.get(key)
+            if version is None:
+                # Seed with a timestamp so an evicted key never rolls the version back
+                atomic_add(key, time.time_ns(), timeout=None, backend=self.backend)
+                version = self.backend.get(key)
+            self.local.set(key, version, getattr(settings, 'GAME_CACHE_VERSION_TTL', 1))
+        return version
+
+    async def aversion(self, namespace):
+        """Async version of version()"""
+        key = self._version_key(namespace)
+        version = self.local.get(key)
+        if version is MISSING:
+            version = await self.backend.aget(key)
+            if version is None:
+                await sync_to_async(atomic_add, thread_sensitive=False)(
+                    key, time.time_ns(), timeout=None, backend=self.backend
+                )
+                version = await self.backend.aget(key)
+            self.local.set(key, version, getattr(settings, 'GAME_CACHE_VERSION_TTL', 1))
+        return version
+
+    def bump(self, namespace):
+        """Invalidate everything cached under a namespace"""
+        key = self._version_key(namespace)
+        try:
+            version = atomic_incr(key, backend=self.backend)
+        except ValueError:
+            version = time.time_ns()
+            self.backend.set(key, version, timeout=None)
+        self.local.delete(key)
+        return version
+
+    def key(self, namespace, key):
+        return f'core:{namespace}:{self.version(namespace)}:{key}'
+
+    # Values
+
+    def get(self, key, default=None):
+        value = self._lookup(key, count=True)
+        return default if value is MISSING else value
+
+    def _lookup(self, key, count=False):
+        value = self.local.get(key)
+        if value is not MISSING:
+            if count:
+                self._count('local_hits')
+            return value
+        value = self.backend.get(key, MISSING)
+        if value is MISSING:
+            if count:
+                self._count('misses')
+            return MISSING
+        if count:
+            self._count('shared_hits')
+        self.local.set(key, value, getattr(settings, 'GAME_CACHE_LOCAL_TTL', 60))
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.backend.set(key, value, timeout=timeout)
+        local_ttl = getattr(settings, 'GAME_CACHE_LOCAL_TTL', 60)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            local_ttl = min(local_ttl, timeout)
+        self.local.set(key, value, local_ttl)
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        Return the cached value of `key`, computing it at most once at a time
+
+        On a miss, threads of this process wait on a striped lock and other
+        processes on a lease key in the shared tier, so a cold key costs one
+        computation instead of one per concurrent request. A caller that
+        waits longer than GAME_CACHE_LOCK_TIMEOUT computes the value itself.
+        """
+        value = self._lookup(key, count=True)
+        if value is not MISSING:
+            return value
+
+        with self._locks[zlib.crc32(key.encode()) % LOCK_STRIPES]:
+            # Computed by another thread while this one waited for the lock
+            value = self._lookup(key)
+            if value is not MISSING:
+                self._count('waits')
+                return value
+
+            lock_timeout = getattr(settings, 'GAME_CACHE_LOCK_TIMEOUT', 10)
+            lease = f'{key}:lease'
+            leased = atomic_add(lease, 1, timeout=lock_timeout, backend=self.backend)
+            if not leased:
+                # Another process is computing it: poll the shared tier until it shows up
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = self.backend.get(key, MISSING)
+                    if value is not MISSING:
+                        self._count('waits')
+                        self.local.set(key, value, getattr(settings, 'GAME_CACHE_LOCAL_TTL', 60))
+                        return value
+            try:
+                self._count('computes')
+                value = compute()
+                self.set(key, value, timeout)
+            finally:
+                if leased:
+                    self.backend.delete(lease)
+            return value
+
+
+game_cache = TwoTierCache()
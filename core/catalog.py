@@ -0,0 +1,84 @@
+"""
+Versioned vocabulary catalog for client-side question generation
+
+The catalog version is the id of the newest CatalogChange row, so it is
+durable and only moves forward, unlike the cache-backed snapshot version. A
+client keeps the version of its last download and asks for the changes after
+it: entries written since are sent again in full, entries deleted since are
+sent as ids.
+"""
+import json
+
+from django.conf import settings
+
+from .caching import game_cache
+from .models import CatalogChange, VocabularyEntry
+
+CATALOG_FIELDS = ('id', 'concept', 'hint', 'arabic_text', 'hebrew_text')
+
+
+def record_entry_changes(entry_ids, deleted=False):
+    """Append one change per entry; call inside the transaction that wrote them"""
+    CatalogChange.objects.bulk_create([CatalogChange(entry_id=entry_id, deleted=deleted) for entry_id in entry_ids])
+
+
+def record_bulk_upserts(entries):
+    """
+    Log entries written by bulk_create/bulk_update, which send no post_save
+
+    Upserts return their ids where the backend supports it; otherwise the
+    ids are looked up by concept.
+    """
+    entry_ids = [entry.pk for entry in entries]
+    if None in entry_ids:
+        entry_ids = VocabularyEntry.objects.filter(
+            concept__in=[entry.concept for entry in entries]
+        ).values_list('id', flat=True)
+    record_entry_changes(entry_ids)
+
+
+def catalog_version():
+    return CatalogChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _entries(queryset):
+    return [dict(zip(CATALOG_FIELDS, row)) for row in queryset.order_by('id').values_list(*CATALOG_FIELDS)]
+
+
+def full_catalog(version):
+    """
+    The whole catalog rendered as JSON bytes, cached per version
+
+    Entries are read after the version, so the body may already include
+    later changes; clients applying the next delta just write them again.
+    """
+    def render():
+        return json.dumps(
+            {'version': version, 'full': True, 'entries': _entries(VocabularyEntry.objects.all())},
+            ensure_ascii=False,
+        ).encode('utf-8')
+
+    return game_cache.get_or_set(
+        game_cache.key('vocabulary', f'catalog:{version}'),
+        render,
+        timeout=getattr(settings, 'GAME_CATALOG_CACHE_TIMEOUT', 3600),
+    )
+
+
+def catalog_delta(since, version):
+    """
+    Upserts and deletes between two versions, or None when a full download
+    is cheaper (more than GAME_CATALOG_DELTA_MAX changed entries)
+    """
+    latest = {}
+    for entry_id, deleted in (
+        CatalogChange.objects.filter(id__gt=since, id__lte=version).order_by('id').values_list('entry_id', 'deleted')
+    ):
+        latest[entry_id] = deleted
+    if len(latest) > getattr(settings, 'GAME_CATALOG_DELTA_MAX', 5000):
+        return None
+
+    upserts = _entries(VocabularyEntry.objects.filter(id__in=[i for i, deleted in latest.items() if not deleted]))
+    found = {entry['id'] for entry in upserts}
+    deletes = sorted(entry_id for entry_id in latest if entry_id not in found)
+    return {'version': version, 'full': False, 'since': since, 'upserts': upserts, 'deletes': deletes}
@@ -0,0 +1,93 @@
+"""
+Pool of pre-generated question decks kept in Django's cache
+
+Each deck is the exact `questions` payload GameVocabularyView would build.
+Decks are stored one per cache key under a vocabulary version, language and
+deck size; `tail` counts decks pushed and `head` counts decks handed out, so
+pushing and popping only need an atomic increment (core.caching.atomic_incr,
+which locks around FileBasedCache's non-atomic incr()). Keys of an old
+vocabulary version are never read again and simply expire.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import atomic_add, atomic_incr
+from .questions import build_questions
+
+
+def _key(version, lang, size, suffix):
+    return f'core:decks:{version}:{lang}:{size}:{suffix}'
+
+
+def _timeout():
+    return getattr(settings, 'GAME_DECK_TIMEOUT', 24 * 3600)
+
+
+def _counter(version, lang, size, name):
+    key = _key(version, lang, size, name)
+    atomic_add(key, 0, timeout=_timeout(), backend=cache)
+    return key
+
+
+def pool_size(version, lang, size):
+    """Number of decks still waiting to be served"""
+    counters = cache.get_many([_key(version, lang, size, 'head'), _key(version, lang, size, 'tail')])
+    head = counters.get(_key(version, lang, size, 'head'), 0)
+    tail = counters.get(_key(version, lang, size, 'tail'), 0)
+    return max(tail - head, 0)
+
+
+def push_decks(version, lang, size, decks):
+    """Append decks to the pool"""
+    if not decks:
+        return
+    tail = atomic_incr(_counter(version, lang, size, 'tail'), len(decks), backend=cache)
+    first = tail - len(decks) + 1
+    cache.set_many(
+        {_key(version, lang, size, first + i): deck for i, deck in enumerate(decks)},
+        timeout=_timeout()
+    )
+
+
+def pop_deck(version, lang, size):
+    """Take one deck from the pool, or None when it is empty"""
+    if not pool_size(version, lang, size):
+        return None
+    slot = atomic_incr(_counter(version, lang, size, 'head'), backend=cache)
+    key = _key(version, lang, size, slot)
+    deck = cache.get(key)
+    if deck is not None:
+        cache.delete(key)
+    return deck
+
+
+def _take_slot(head_key):
+    atomic_add(head_key, 0, timeout=_timeout(), backend=cache)
+    return atomic_incr(head_key, backend=cache)
+
+
+async def apop_deck(version, lang, size):
+    """Async version of pop_deck()"""
+    head_key, tail_key = _key(version, lang, size, 'head'), _key(version, lang, size, 'tail')
+    counters = await cache.aget_many([head_key, tail_key])
+    if counters.get(tail_key, 0) <= counters.get(head_key, 0):
+        return None
+    slot = await sync_to_async(_take_slot, thread_sensitive=False)(head_key)
+    key = _key(version, lang, size, slot)
+    deck = await cache.aget(key)
+    if deck is not None:
+        await cache.adelete(key)
+    return deck
+
+
+def generate_decks(snapshot, lang, size, count):
+    """Build `count` decks from a vocabulary snapshot and add them to the pool"""
+    if len(snapshot) < size:
+        return 0
+    decks = [
+        build_questions(snapshot.sample(size), lang, snapshot.distractors)
+        for _ in range(count)
+    ]
+    push_decks(snapshot.version, lang, size, decks)
+    return len(decks)
@@ -0,0 +1,86 @@
+import bisect
+import random
+from collections import defaultdict
+
+from django.conf import settings
+
+ANSWER_FIELDS = {
+    'ar': 'arabic_text',
+    'he': 'hebrew_text',
+}
+
+
+class DistractorIndex:
+    """
+    Wrong-answer lookup for multiple-choice questions
+
+    Answers are kept in one array per language and grouped by stripped text
+    length, the dimension Vocabulary.clean() checks, so distractors look like
+    plausible answers. Each length gets a precomputed candidate pool that is
+    widened with the nearest lengths until it is large enough to sample from.
+    """
+
+    def __init__(self, entries):
+        min_pool = getattr(settings, 'GAME_DISTRACTOR_MIN_POOL', 12)
+
+        self.positions = {entry.id: i for i, entry in enumerate(entries)}
+        self.answers = {}
+        self.pools = {}
+        for lang, field in ANSWER_FIELDS.items():
+            texts = [getattr(entry, field) for entry in entries]
+            self.answers[lang] = texts
+            self.pools[lang] = self._build_pools(texts, min_pool)
+
+    @staticmethod
+    def _build_pools(texts, min_pool):
+        """Map each text length to the candidate positions used for it"""
+        buckets = defaultdict(list)
+        for i, text in enumerate(texts):
+            buckets[len(text.strip())].append(i)
+
+        lengths = sorted(buckets)
+        pools = {}
+        for length in lengths:
+            pool = list(buckets[length])
+            # Widen with the closest lengths on either side until the pool is big enough
+            centre = bisect.bisect_left(lengths, length)
+            lower, upper = centre - 1, centre + 1
+            while len(pool) < min_pool and (lower >= 0 or upper < len(lengths)):
+                below = length - lengths[lower] if lower >= 0 else None
+                above = lengths[upper] - length if upper < len(lengths) else None
+                if above is None or (below is not None and below <= above):
+                    pool.extend(buckets[lengths[lower]])
+                    lower -= 1
+                else:
+                    pool.extend(buckets[lengths[upper]])
+                    upper += 1
+            pools[length] = pool
+        return pools
+
+    def pick(self, entry, lang, k=3):
+        """Return up to k distinct wrong answers in `lang` for `entry`"""
+        texts = self.answers[lang]
+        position = self.positions.get(entry.id)
+        correct = getattr(entry, ANSWER_FIELDS[lang])
+        pool = self.pools[lang].get(len(correct.strip()), ())
+
+        picked = []
+        seen = {correct}
+        # Rejection sampling keeps the expected cost at O(k) for realistic pools
+        for _ in range(k * 8 if pool else 0):
+            i = random.choice(pool)
+            if i != position and texts[i] not in seen:
+                seen.add(texts[i])
+                picked.append(texts[i])
+                if len(picked) == k:
+                    return picked
+
+        # Small or repetitive vocabularies: walk the pool, then everything else
+        for candidates in (pool, range(len(texts))):
+            for i in random.sample(candidates, len(candidates)):
+                if i != position and texts[i] not in seen:
+                    seen.add(texts[i])
+                    picked.append(texts[i])
+                    if len(picked) == k:
+                        return picked
+        return picked
@@ -0,0 +1,157 @@
+"""
+Request handling shared by the sync and async game views
+
+GameVocabularyView/SubmitGameView (views.py) and their async-native twins
+(async_views.py) validate requests, choose where questions come from and
+build their responses with these helpers; the views themselves only differ
+in how they wait for the database and the cache.
+"""
+import uuid
+
+from django.conf import settings
+
+from .distractors import DistractorIndex
+from .mastery import adaptive_enabled, pick_adaptive
+from .metrics import questions_served
+from .models import GameResponse, GameSession
+from .questions import build_questions
+from .serializers import GameResponseSubmitSerializer
+from .session_tokens import make_session_token, read_session_token
+
+
+class GameRequestError(Exception):
+    """A request the game views answer with {'error': message, **extra}"""
+
+    def __init__(self, message, status=400, headers=None, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.headers = headers
+        self.extra = extra
+
+    def body(self):
+        return {'error': self.message, **self.extra}
+
+
+def generate_session_id():
+    """Generate a unique session ID using UUID"""
+    return str(uuid.uuid4())
+
+
+def snapshot_enabled():
+    return getattr(settings, 'GAME_SNAPSHOT_ENABLED', True)
+
+
+def decks_enabled():
+    return getattr(settings, 'GAME_DECKS_ENABLED', False)
+
+
+def signed_sessions():
+    return getattr(settings, 'GAME_SESSION_MODE', 'db') == 'signed'
+
+
+def write_behind_enabled():
+    return getattr(settings, 'GAME_WRITE_BEHIND', False)
+
+
+def adaptive_selection_enabled():
+    # Adaptive picks need the snapshot's by-concept index
+    return adaptive_enabled() and snapshot_enabled()
+
+
+# Questions
+
+def parse_question_request(params):
+    """Validated (lang, n) of a vocabulary request"""
+    lang = params.get('LANG', 'he')  # Default to Hebrew
+    try:
+        n = int(params.get('N', 5))  # Default to 5 questions
+    except ValueError:
+        raise GameRequestError('N must be an integer')
+    max_questions = getattr(settings, 'GAME_MAX_QUESTIONS', 50)
+    if not 1 <= n <= max_questions:
+        raise GameRequestError(f'N must be between 1 and {max_questions}')
+    if lang not in ['ar', 'he']:
+        raise GameRequestError('Language must be either "ar" (Arabic) or "he" (Hebrew)')
+    return lang, n
+
+
+def adaptive_questions(snapshot, mastery, lang, n):
+    """Questions weighted towards a session's weak concepts, or None when the vocabulary is too small"""
+    if len(snapshot) < n:
+        return None
+    return build_questions(pick_adaptive(snapshot, mastery, n), lang, snapshot.distractors)
+
+
+def snapshot_sample(snapshot, n):
+    """n random entries of the snapshot, its distractor index and the vocabulary size"""
+    if len(snapshot) < n:
+        return [], None, len(snapshot)
+    return snapshot.sample(n), snapshot.distractors, len(snapshot)
+
+
+def distractor_pool_size():
+    """Extra rows sampled from the database to draw distractors from"""
+    return getattr(settings, 'GAME_SAMPLING_DISTRACTOR_POOL', 200)
+
+
+def database_sample(sample):
+    """Entries, distractor index and vocabulary size of a sampling.sample_entries() result"""
+    return sample.entries, DistractorIndex(sample.entries + sample.extra), sample.total
+
+
+def sampled_questions(entries, distractors, available, lang, n):
+    if available < n:
+        raise GameRequestError(f'Not enough vocabulary available (need {n}, have {available})')
+    return build_questions(entries, lang, distractors)
+
+
+def signed_session_token(token, lang):
+    """Reuse a valid signed session token or issue a new one, without touching the database"""
+    if token and read_session_token(token) is not None:
+        return token
+    return make_session_token(generate_session_id(), lang)
+
+
+def questions_response(session_id, questions, source, lang):
+    questions_served.inc(len(questions), source=source, lang=lang)
+    return {'session_id': session_id, 'questions': questions}
+
+
+# Submits
+
+def parse_submission(data):
+    """Validate a whole submit payload before touching the database; returns the validated responses"""
+    if 'session_id' not in data:
+        raise GameRequestError('session_id is required')
+    if 'responses' not in data or not isinstance(data['responses'], list):
+        raise GameRequestError('responses must be a list')
+    max_responses = getattr(settings, 'GAME_SUBMIT_MAX_RESPONSES', 100)
+    if len(data['responses']) > max_responses:
+        raise GameRequestError(f'Too many responses (max {max_responses})')
+
+    serializer = GameResponseSubmitSerializer(data=data['responses'], many=True)
+    if not serializer.is_valid():
+        raise GameRequestError('Invalid responses', details=serializer.errors)
+    return serializer.validated_data
+
+
+def signed_session_owner(token):
+    """(session_id, lang) of a signed session token; raises GameSession.DoesNotExist if invalid"""
+    owner = read_session_token(token)
+    if owner is None:
+        raise GameSession.DoesNotExist
+    return owner
+
+
+def response_rows(session, responses):
+    return [GameResponse(session=session, **response) for response in responses]
+
+
+def write_behind_timeout():
+    """Seconds a submit waits for room in the write-behind buffer"""
+    return getattr(settings, 'GAME_WRITE_BEHIND_PUT_TIMEOUT', 0.5)
+
+
+def server_busy():
+    return GameRequestError('Server busy, please retry', status=503, headers={'Retry-After': '1'})
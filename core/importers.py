@@ -0,0 +1,121 @@
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .catalog import record_bulk_upserts
+from .models import Vocabulary, VocabularyEntry
+from .snapshot import bump_vocabulary_version
+from .validation import check_length_rule
+
+REQUIRED_COLUMNS = ('concept', 'arabic_word__text', 'hebrew_word__text')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # (row number, concept, message)
+
+    def add_error(self, row_num, concept, message):
+        self.errors.append((row_num, concept, message))
+
+
+class VocabularyImporter:
+    """
+    Set-based CSV import of vocabulary
+
+    Rows are streamed from the file and handled in chunks: each chunk is
+    validated in memory (required columns, field lengths and the Arabic/Hebrew
+    length rule Vocabulary.clean() enforces), then written with one upsert for
+    Vocabulary and one for VocabularyEntry. Like the row-by-row import, every
+    concept gets correct 'ar' and 'he' rows and an 'en' row holding the
+    concept itself. Invalid rows are reported and nothing is written for them.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or getattr(settings, 'VOCABULARY_IMPORT_CHUNK_SIZE', 500)
+
+    def run(self, csv_file):
+        result = ImportResult()
+        reader = csv.DictReader(csv_file)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            result.add_error(0, '', f"Missing columns: {', '.join(missing)}")
+            return result
+
+        rows = enumerate(reader, start=2)  # row 1 is the header
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk, result)
+
+        if result.created or result.updated:
+            transaction.on_commit(bump_vocabulary_version)
+        return result
+
+    def _clean_row(self, row):
+        """Return (concept, hint, arabic, hebrew) or raise ValueError"""
+        concept = (row.get('concept') or '').strip()
+        arabic = row.get('arabic_word__text') or ''
+        hebrew = row.get('hebrew_word__text') or ''
+        hint = row.get('hint') or ''
+
+        if not concept:
+            raise ValueError("concept is required")
+        if len(concept) > 100:
+            raise ValueError("concept is longer than 100 characters")
+        for label, text in (('Arabic', arabic), ('Hebrew', hebrew)):
+            if not text.strip():
+                raise ValueError(f"{label} text is required")
+            if len(text) > 255:
+                raise ValueError(f"{label} text is longer than 255 characters")
+
+        violation = check_length_rule(concept, arabic, hebrew)
+        if violation:
+            raise ValueError(violation.message)
+        return concept, hint, arabic, hebrew
+
+    def _import_chunk(self, chunk, result):
+        valid = {}
+        for row_num, row in chunk:
+            try:
+                concept, hint, arabic, hebrew = self._clean_row(row)
+            except ValueError as e:
+                result.add_error(row_num, row.get('concept') or '', str(e))
+                continue
+            # A concept repeated in the file is updated in file order, so the last row wins
+            valid[concept] = (hint, arabic, hebrew)
+        if not valid:
+            return
+
+        translations = []
+        entries = []
+        for concept, (hint, arabic, hebrew) in valid.items():
+            translations += [
+                Vocabulary(concept=concept, language='ar', text=arabic, hint=hint, is_correct=True),
+                Vocabulary(concept=concept, language='he', text=hebrew, hint=hint, is_correct=True),
+                Vocabulary(concept=concept, language='en', text=concept, hint=hint, is_correct=False),
+            ]
+            entries.append(VocabularyEntry(concept=concept, hint=hint, arabic_text=arabic, hebrew_text=hebrew))
+
+        with transaction.atomic():
+            existing = Vocabulary.objects.filter(concept__in=valid).count()
+            Vocabulary.objects.bulk_create(
+                translations,
+                update_conflicts=True,
+                unique_fields=['concept', 'language'],
+                update_fields=['text', 'hint', 'is_correct', 'updated_at'],
+            )
+            VocabularyEntry.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['concept'],
+                update_fields=['hint', 'arabic_text', 'hebrew_text'],
+            )
+            record_bulk_upserts(entries)
+
+        result.updated += existing
+        result.created += len(translations) - existing
@@ -0,0 +1,170 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .metrics import responses_ingested
+from .models import GameResponse, GameSession
+
+logger = logging.getLogger(__name__)
+
+
+def save_responses(rows):
+    """
+    Insert unsaved GameResponse rows and update their sessions' counters
+
+    Both happen in one transaction: one bulk INSERT plus one UPDATE per
+    session, with the counters advanced by F() expressions so concurrent
+    submits to the same session cannot lose updates.
+    """
+    by_session = {}
+    for row in rows:
+        by_session.setdefault(row.session_id, []).append(row)
+
+    now = timezone.now()
+    with transaction.atomic():
+        GameResponse.objects.bulk_create(rows)
+        for session_id, session_rows in by_session.items():
+            times = [row.response_time_ms for row in session_rows]
+            fastest, slowest = Value(min(times)), Value(max(times))
+            GameSession.objects.filter(pk=session_id).update(
+                response_count=F('response_count') + len(times),
+                correct_count=F('correct_count') + sum(1 for row in session_rows if row.is_correct),
+                total_response_time_ms=F('total_response_time_ms') + sum(times),
+                min_response_time_ms=Least(Coalesce('min_response_time_ms', fastest), fastest),
+                max_response_time_ms=Greatest(Coalesce('max_response_time_ms', slowest), slowest),
+                last_activity_at=now,
+            )
+    responses_ingested.inc(len(rows))
+
+
+class ResponseBuffer:
+    """
+    Bounded in-process queue of unsaved GameResponse rows
+
+    A background thread drains it with bulk_create whenever `batch_size` rows
+    are waiting or `interval` seconds have passed, so concurrent submits share
+    one SQLite write lock instead of taking it one by one.
+    """
+
+    def __init__(self, max_size=10000, batch_size=500, interval=1.0, retries=3):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.counters = {'queued': 0, 'flushed': 0, 'dropped': 0}
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='response-buffer', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        """Flush everything still queued and stop the flusher"""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def offer(self, rows, timeout=0.5):
+        """
+        Queue all rows or none of them
+
+        Blocks up to `timeout` seconds for room (backpressure) and returns
+        False if the queue is still full, so the caller can ask the client
+        to retry.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._stopping or len(self._rows) + len(rows) > self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    self.counters['dropped'] += len(rows)
+                    return False
+                self._cond.wait(remaining)
+
+            self._rows.extend(rows)
+            self.counters['queued'] += len(rows)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, pending=len(self._rows))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while self._flush_batch():
+            pass
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    if not self._stopping and len(self._rows) < self.batch_size:
+                        self._cond.wait(self.interval)
+                    stopping = self._stopping
+                if stopping:
+                    self.flush()
+                    return
+                self._flush_batch()
+        finally:
+            connection.close()
+
+    def _flush_batch(self):
+        with self._cond:
+            batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+            # Wake up submits waiting for room
+            self._cond.notify_all()
+        if not batch:
+            return False
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                save_responses(batch)
+                with self._cond:
+                    self.counters['flushed'] += len(batch)
+                return True
+            except Exception:
+                logger.exception("Flushing %d game responses failed (attempt %d)", len(batch), attempt)
+                time.sleep(0.1 * attempt)
+
+        with self._cond:
+            self.counters['dropped'] += len(batch)
+        return True
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_response_buffer():
+    """Return the process-wide buffer, starting its flusher on first use"""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ResponseBuffer(
+                max_size=getattr(settings, 'GAME_WRITE_BEHIND_MAX_QUEUE', 10000),
+                batch_size=getattr(settings, 'GAME_WRITE_BEHIND_BATCH_SIZE', 500),
+                interval=getattr(settings, 'GAME_WRITE_BEHIND_INTERVAL', 1.0),
+            )
+            _buffer.start()
+            atexit.register(_buffer.stop)
+        return _buffer
@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timedelta, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.archive import FORMATS, archive_responses
+
+
+class Command(BaseCommand):
+    help = 'Move old GameResponse rows into gzip-compressed monthly archive files and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=180, help='Archive responses older than this')
+        parser.add_argument('--before', help='Archive responses submitted before this date (YYYY-MM-DD)')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--directory', help='Archive directory (default: RESPONSE_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Responses written and deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between chunks')
+        parser.add_argument('--max-chunks', type=int, help='Stop after this many chunks (resume on the next run)')
+        parser.add_argument('--ignore-rollups', action='store_true',
+                            help='Also archive responses the concept rollups have not processed (they are lost to the stats)')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                day = parse_date(options['before'])
+            except ValueError:
+                # Well-formed but impossible, e.g. February 30th
+                day = None
+            if day is None:
+                raise CommandError('--before must be a date (YYYY-MM-DD)')
+            before = timezone.make_aware(datetime.combine(day, dt_time.min))
+        else:
+            before = timezone.now() - timedelta(days=options['older_than_days'])
+        directory = options['directory'] or settings.RESPONSE_ARCHIVE_DIR
+
+        started = time.monotonic()
+        result = archive_responses(
+            before, directory, fmt=options['format'], chunk_size=options['chunk_size'],
+            pause=options['pause'], max_chunks=options['max_chunks'], ignore_rollups=options['ignore_rollups'],
+        )
+        for path in result.files:
+            self.stdout.write(f"  {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result.archived} responses submitted before {before:%Y-%m-%d %H:%M}, "
+            f"deleted {result.deleted} in {time.monotonic() - started:.2f}s"
+        ))
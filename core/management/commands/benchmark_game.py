@@ -0,0 +1,114 @@
+import copy
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core.benchmark import compare, run_load, seed_entries
+from core.caching import game_cache
+
+ENDPOINTS = ('vocabulary', 'submit')
+COLUMNS = ('requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark /api/game/vocabulary/ and /api/game/submit/ with concurrent clients against a throwaway '
+        'database at several vocabulary sizes, and optionally compare with a stored baseline. '
+        'The project database, cache and metrics are never touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,10000,100000', help='Comma-separated VocabularyEntry counts')
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--rounds', type=int, default=25, help='Get/submit rounds per client')
+        parser.add_argument('--questions', type=int, default=5, help='Questions per game')
+        parser.add_argument('--warmup', type=int, default=5, help='Unrecorded rounds before each size')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Baseline JSON (as written by --output) to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results to --baseline instead of comparing')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p95/throughput change as a fraction')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when the baseline comparison finds regressions')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline needs --baseline')
+        baseline = None
+        if options['baseline'] and not options['save_baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        results = self._run(sizes, options)
+
+        if options['output']:
+            self._write(options['output'], results)
+        if options['save_baseline']:
+            self._write(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+        if baseline is None:
+            return
+
+        regressions = compare(results, baseline, options['threshold'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+            return
+        for finding in regressions:
+            self.stdout.write(self.style.WARNING(finding))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+
+    def _run(self, sizes, options):
+        # A file database (not :memory:) so every client thread sees the same data
+        workdir = tempfile.mkdtemp(prefix='simsim-benchmark-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = {}
+        try:
+            # Read paths must hit the seeded database, not a configured replica, and the
+            # version bumps, decks, sessions and metrics stay out of the live server's
+            caches = copy.deepcopy(settings.CACHES)
+            caches['default']['LOCATION'] = os.path.join(workdir, 'cache')
+            with override_settings(DATABASE_READ_ALIAS='default', CACHES=caches,
+                                   METRICS_DIR=os.path.join(workdir, 'metrics')):
+                game_cache.local.clear()
+                for size in sizes:
+                    seed_entries(size)
+                    summary, errors = run_load(
+                        options['clients'], options['rounds'], options['questions'], options['warmup']
+                    )
+                    for error in errors:
+                        self.stderr.write(f'{size} entries: client failed: {error}')
+                    results[f'{size}_entries'] = summary
+                    self._report(size, options['clients'], summary)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            game_cache.local.clear()
+            shutil.rmtree(workdir, ignore_errors=True)
+        return results
+
+    def _report(self, size, clients, summary):
+        self.stdout.write(f'{size} entries, {clients} clients')
+        self.stdout.write('  ' + ''.join(f'{column:>20}' for column in ('endpoint',) + COLUMNS))
+        for endpoint in ENDPOINTS:
+            if endpoint in summary:
+                row = summary[endpoint]
+                self.stdout.write('  ' + ''.join(f'{value:>20}' for value in (endpoint,) + tuple(row[c] for c in COLUMNS)))
+
+    def _write(self, path, results):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.decks import generate_decks, pool_size
+from core.snapshot import get_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate question decks into the cache for GameVocabularyView'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lang', choices=['ar', 'he'], action='append',
+                            help='Question language (repeatable, default: both)')
+        parser.add_argument('--size', type=int, default=5, help='Questions per deck (the N of the API)')
+        parser.add_argument('--count', type=int, default=1000, help='Decks to keep in the pool per language')
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and top the pools up every --interval seconds')
+        parser.add_argument('--interval', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        languages = options['lang'] or ['he', 'ar']
+
+        while True:
+            snapshot = get_snapshot()
+            for lang in languages:
+                missing = options['count'] - pool_size(snapshot.version, lang, options['size'])
+                if missing <= 0:
+                    continue
+                generated = generate_decks(snapshot, lang, options['size'], missing)
+                if generated:
+                    self.stdout.write(f"Generated {generated} '{lang}' decks for vocabulary version {snapshot.version}")
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        f"Not enough vocabulary for decks of {options['size']} questions"
+                    ))
+
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS("Deck pools are full"))
@@ -0,0 +1,37 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import FORMATS, load_archive, partition_path
+
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+
+class Command(BaseCommand):
+    help = 'Re-import archived GameResponse partitions (files or YYYY-MM months) for analysis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('partitions', nargs='+', help='Archive files, or months looked up in the archive directory')
+        parser.add_argument('--directory', help='Archive directory for months (default: RESPONSE_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Records inserted per transaction')
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or settings.RESPONSE_ARCHIVE_DIR
+        paths = []
+        for partition in options['partitions']:
+            if MONTH_RE.match(partition):
+                found = [partition_path(directory, partition, fmt) for fmt in FORMATS]
+                found = [path for path in found if os.path.exists(path)]
+                if not found:
+                    raise CommandError(f"No archive for {partition} in {directory}")
+                paths += found
+            elif os.path.exists(partition):
+                paths.append(partition)
+            else:
+                raise CommandError(f"Archive file not found: {partition}")
+
+        for path in paths:
+            loaded = load_archive(path, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} responses from {path}"))
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.purge import purge_abandoned_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete GameSession rows that never recorded a response and are older than a TTL. '
+        'Run it from cron, or keep it running with --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-hours', type=float, help='Session age before it is purged (default: GAME_SESSION_TTL_HOURS)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Largest number of sessions per DELETE')
+        parser.add_argument('--max-lock-ms', type=float, default=100, help='Shrink batches that hold the write lock longer')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--every', type=float, help='Repeat the purge every this many seconds until interrupted')
+
+    def handle(self, *args, **options):
+        ttl_hours = options['ttl_hours']
+        if ttl_hours is None:
+            ttl_hours = getattr(settings, 'GAME_SESSION_TTL_HOURS', 24)
+
+        while True:
+            result = purge_abandoned_sessions(
+                timezone.now() - timedelta(hours=ttl_hours),
+                batch_size=options['batch_size'],
+                max_lock_ms=options['max_lock_ms'],
+                pause=options['pause'],
+                max_batches=options['max_batches'],
+            )
+            rate = result.deleted / result.elapsed if result.elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"Purged {result.deleted} sessions in {result.batches} batches, {result.elapsed:.2f}s "
+                f"({rate:.0f}/s, longest batch {result.longest_batch_ms}ms)"
+            ))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import read_database, refresh_sqlite_replica
+from core.snapshot import bump_vocabulary_version
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the local read replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', help='Replica alias (default: DATABASE_READ_ALIAS, or "replica" if unset)')
+
+    def handle(self, *args, **options):
+        target = options['target'] or (read_database() if read_database() != 'default' else 'replica')
+        started = time.monotonic()
+        try:
+            refresh_sqlite_replica(target=target)
+        except ValueError as e:
+            raise CommandError(str(e))
+        # Snapshots loaded from the old copy were stamped with the current version; reload them
+        bump_vocabulary_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied 'default' into '{target}' in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from core.models import GameResponse, GameSession
+
+COUNTER_FIELDS = [
+    'response_count', 'correct_count', 'total_response_time_ms',
+    'min_response_time_ms', 'max_response_time_ms', 'last_activity_at',
+]
+ARCHIVED_FIELDS = ['archived_response_count', 'archived_correct_count', 'archived_response_time_ms']
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized GameSession counters from GameResponse and the archived totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Sessions recomputed per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        repaired = checked = 0
+        last_id = 0
+
+        while True:
+            # Recompute and write each chunk under the write lock, so a submit cannot add
+            # answers between the GROUP BY and the update and have its increments overwritten:
+            # SQLite takes the lock at BEGIN (transaction_mode IMMEDIATE), other databases
+            # lock the chunk's session rows, which save_responses() also updates.
+            with transaction.atomic():
+                sessions = list(
+                    GameSession.objects.select_for_update()
+                    .filter(id__gt=last_id).order_by('id').only('id', *COUNTER_FIELDS, *ARCHIVED_FIELDS)[:chunk_size]
+                )
+                if not sessions:
+                    break
+                last_id = sessions[-1].id
+                changed = self._recompute(sessions)
+                if changed:
+                    GameSession.objects.bulk_update(changed, COUNTER_FIELDS)
+            checked += len(sessions)
+            repaired += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} sessions, repaired {repaired} in {time.monotonic() - started:.2f}s"
+        ))
+
+    def _recompute(self, sessions):
+        """
+        Set the counters of `sessions` from their responses plus what was
+        archived of them; returns the sessions that changed
+        """
+        # One GROUP BY over the (session, submitted_at) index per chunk
+        totals = {
+            row['session']: row
+            for row in GameResponse.objects.filter(session__in=[s.id for s in sessions])
+            .values('session')
+            .annotate(
+                response_count=Count('id'),
+                correct_count=Count('id', filter=Q(is_correct=True)),
+                total_response_time_ms=Sum('response_time_ms'),
+                min_response_time_ms=Min('response_time_ms'),
+                max_response_time_ms=Max('response_time_ms'),
+                last_activity_at=Max('submitted_at'),
+            )
+            .order_by()
+        }
+
+        changed = []
+        for session in sessions:
+            row = totals.get(session.id, {})
+            expected = {
+                'response_count': row.get('response_count', 0) + session.archived_response_count,
+                'correct_count': row.get('correct_count', 0) + session.archived_correct_count,
+                'total_response_time_ms': (row.get('total_response_time_ms') or 0) + session.archived_response_time_ms,
+                'min_response_time_ms': row.get('min_response_time_ms'),
+                'max_response_time_ms': row.get('max_response_time_ms'),
+                'last_activity_at': row.get('last_activity_at', session.last_activity_at),
+            }
+            if session.archived_response_count:
+                # The archive keeps no per-session extremes: widen the stored ones by the remaining rows
+                for field, pick in [('min_response_time_ms', min), ('max_response_time_ms', max)]:
+                    known = [value for value in (getattr(session, field), expected[field]) if value is not None]
+                    expected[field] = pick(known, default=None)
+            if any(getattr(session, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(session, field, value)
+                changed.append(session)
+        return changed
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.rollups import reset_rollups, roll_up_responses
+
+
+class Command(BaseCommand):
+    help = 'Fold new GameResponse rows into the per-concept daily rollups (backfills history on first run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Responses processed per transaction')
+        parser.add_argument('--max-chunks', type=int, help='Stop after this many chunks (resume on the next run)')
+        parser.add_argument('--reset', action='store_true', help='Drop existing rollups and rebuild them from scratch')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_rollups()
+            self.stdout.write("Rollups cleared, backfilling from the first response")
+
+        started = time.monotonic()
+        processed = roll_up_responses(chunk_size=options['chunk_size'], max_chunks=options['max_chunks'])
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {processed} responses in {elapsed:.2f}s ({rate:.0f}/s)"
+        ))
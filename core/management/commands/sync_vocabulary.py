@@ -0,0 +1,103 @@
+import time
+from datetime import datetime, time as day_start
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.catalog import record_bulk_upserts
+from core.models import Vocabulary, VocabularyEntry
+from core.snapshot import bump_vocabulary_version
+from core.sync import paired_translations, plan_entry_changes
+
+
+class Command(BaseCommand):
+    help = 'Sync vocabulary from Vocabulary to VocabularyEntry model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only sync concepts with translations changed since this ISO date/datetime')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows written per bulk statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        translations = Vocabulary.objects.filter(language__in=['ar', 'he'], is_correct=True)
+        if options['since']:
+            translations = translations.filter(updated_at__gte=self._parse_since(options['since']))
+        concepts = translations.values('concept')
+
+        # Pair Arabic and Hebrew rows in one joined query
+        started = time.monotonic()
+        pairs = list(paired_translations(concepts))
+        paired = {pair[0] for pair in pairs}
+        unpaired = sorted(set(translations.values_list('concept', flat=True)) - paired)
+        self._phase("pair", started, f"{len(pairs)} concepts")
+        for concept in unpaired[:10]:
+            self.stdout.write(self.style.WARNING(f"Skipping '{concept}' - missing translation"))
+        if len(unpaired) > 10:
+            self.stdout.write(self.style.WARNING(f"... and {len(unpaired) - 10} more missing a translation"))
+
+        # Diff against existing entries in memory
+        started = time.monotonic()
+        existing = {
+            row[0]: row[1:]
+            for row in VocabularyEntry.objects.filter(concept__in=concepts)
+            .order_by()
+            .values_list('concept', 'id', 'hint', 'arabic_text', 'hebrew_text')
+            .iterator(chunk_size=chunk_size)
+        }
+        to_create, to_update = plan_entry_changes(pairs, existing)
+        self._phase("diff", started, f"{len(to_create)} to create, {len(to_update)} to update")
+
+        if options['dry_run']:
+            for entry in (to_create + to_update)[:20]:
+                self.stdout.write(f"  would sync '{entry.concept}'")
+            self.stdout.write(self.style.SUCCESS("Dry run, nothing written"))
+            return
+
+        # Write only the changed rows, one transaction per chunk
+        started = time.monotonic()
+        for start in range(0, len(to_create), chunk_size):
+            with transaction.atomic():
+                VocabularyEntry.objects.bulk_create(to_create[start:start + chunk_size])
+                record_bulk_upserts(to_create[start:start + chunk_size])
+        for start in range(0, len(to_update), chunk_size):
+            with transaction.atomic():
+                VocabularyEntry.objects.bulk_update(
+                    to_update[start:start + chunk_size], ['hint', 'arabic_text', 'hebrew_text']
+                )
+                record_bulk_upserts(to_update[start:start + chunk_size])
+        self._phase("write", started, f"{len(to_create) + len(to_update)} rows")
+
+        if to_create or to_update:
+            bump_vocabulary_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sync complete! Created: {len(to_create)}, Updated: {len(to_update)}, "
+                f"Unchanged: {len(pairs) - len(to_create) - len(to_update)}, Skipped: {len(unpaired)}"
+            )
+        )
+
+    def _parse_since(self, value):
+        invalid = CommandError(f"Invalid --since value '{value}', expected an ISO date or datetime")
+        try:
+            since = parse_datetime(value)
+            if since is None:
+                date = parse_date(value)
+                if date is None:
+                    raise invalid
+                since = datetime.combine(date, day_start.min)
+        except ValueError:
+            # Well-formed but impossible, e.g. February 30th
+            raise invalid
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def _phase(self, name, started, detail):
+        self.stdout.write(f"[{name}] {detail} in {time.monotonic() - started:.3f}s")
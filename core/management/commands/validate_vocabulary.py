@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.validation import validate_length_rule
+
+
+class Command(BaseCommand):
+    help = 'Audit the Arabic/Hebrew length rule for the whole vocabulary; fails if any concept violates it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50, help='Violations to print (0 for all)')
+        parser.add_argument('--json', action='store_true', help='Print violations as JSON lines')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        violations = validate_length_rule()
+        elapsed = time.monotonic() - started
+
+        shown = violations if not options['limit'] else violations[:options['limit']]
+        for violation in shown:
+            if options['json']:
+                self.stdout.write(json.dumps(violation._asdict(), ensure_ascii=False))
+            else:
+                self.stdout.write(self.style.ERROR(violation.message))
+
+        if violations:
+            raise CommandError(f"{len(violations)} concepts violate the length rule (checked in {elapsed:.3f}s)")
+        self.stdout.write(self.style.SUCCESS(f"Vocabulary is valid (checked in {elapsed:.3f}s)"))
@@ -0,0 +1,108 @@
+"""
+Per-session mastery state for adaptive question selection
+
+Each session keeps a small dict in the cache mapping concept -> Leitner box
+(0 = just missed, MAX_BOX = mastered). Submits move concepts between boxes;
+GET reads the dict once and favours concepts in low boxes, so selection never
+touches the response history.
+"""
+import heapq
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .session_tokens import read_session_token
+
+MAX_BOX = 4
+NEW_CONCEPT_BOX = 1
+
+
+def adaptive_enabled():
+    return getattr(settings, 'GAME_SELECTION_MODE', 'random') == 'adaptive'
+
+
+def mastery_session_id(session_id):
+    """The GameSession.session_id a client-supplied session_id or signed token refers to"""
+    if not session_id or getattr(settings, 'GAME_SESSION_MODE', 'db') != 'signed':
+        return session_id
+    token = read_session_token(session_id)
+    return token[0] if token else None
+
+
+def _key(session_id):
+    return f'core:mastery:{session_id}'
+
+
+def _timeout():
+    return getattr(settings, 'GAME_ADAPTIVE_TIMEOUT', 30 * 24 * 3600)
+
+
+def apply_answers(mastery, responses):
+    """
+    Move answered concepts between boxes: a wrong answer drops the concept to
+    box 0, a quick correct one promotes it, a slow correct one keeps it put
+    """
+    slow_ms = getattr(settings, 'GAME_ADAPTIVE_SLOW_MS', 4000)
+    for response in responses:
+        box = mastery.get(response['concept'], NEW_CONCEPT_BOX)
+        if not response['is_correct']:
+            box = 0
+        elif response['response_time_ms'] <= slow_ms:
+            box = min(box + 1, MAX_BOX)
+        mastery[response['concept']] = box
+
+    # Keep the state compact: forget the best-known concepts first
+    max_concepts = getattr(settings, 'GAME_ADAPTIVE_MAX_CONCEPTS', 200)
+    if len(mastery) > max_concepts:
+        for concept in sorted(mastery, key=mastery.get, reverse=True)[:len(mastery) - max_concepts]:
+            del mastery[concept]
+    return mastery
+
+
+def get_mastery(session_id):
+    """concept -> box for a session; {} for new or unknown sessions"""
+    if not session_id:
+        return {}
+    return cache.get(_key(session_id)) or {}
+
+
+async def aget_mastery(session_id):
+    """Async version of get_mastery()"""
+    if not session_id:
+        return {}
+    return await cache.aget(_key(session_id)) or {}
+
+
+def record_answers(session_id, responses):
+    cache.set(_key(session_id), apply_answers(get_mastery(session_id), responses), timeout=_timeout())
+
+
+async def arecord_answers(session_id, responses):
+    mastery = apply_answers(await aget_mastery(session_id), responses)
+    await cache.aset(_key(session_id), mastery, timeout=_timeout())
+
+
+def pick_adaptive(snapshot, mastery, n):
+    """
+    Pick n snapshot entries: up to GAME_ADAPTIVE_REVIEW_RATIO of them are
+    concepts due for review, weighted towards lower boxes, the rest are random
+    """
+    review = [
+        (concept, box) for concept, box in mastery.items()
+        if box < MAX_BOX and concept in snapshot.by_concept
+    ]
+    k = min(len(review), round(n * getattr(settings, 'GAME_ADAPTIVE_REVIEW_RATIO', 0.6)))
+
+    # Weighted sampling without replacement (Efraimidis-Spirakis), weight 2^(MAX_BOX - box)
+    chosen = heapq.nlargest(k, review, key=lambda item: random.random() ** (1 / 2 ** (MAX_BOX - item[1])))
+    entries = [snapshot.by_concept[concept] for concept, _ in chosen]
+
+    picked = {entry.id for entry in entries}
+    for entry in snapshot.sample(min(len(snapshot), n + k)):
+        if len(entries) == n:
+            break
+        if entry.id not in picked:
+            entries.append(entry)
+    random.shuffle(entries)
+    return entries
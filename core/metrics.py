@@ -0,0 +1,299 @@
+"""
+Process-shared metrics in the Prometheus text format
+
+Every worker process writes its samples into its own memory-mapped file in
+METRICS_DIR (one file per pid, so writers never contend across processes),
+and the metrics endpoint sums the files of all processes when scraped.
+Counters and histograms from workers that have exited keep counting towards
+the totals, so empty the directory when deploying, before the new workers
+start.
+
+Each file starts with the number of bytes in use (4 bytes, padded to 8),
+followed by entries of: key length (4 bytes), the UTF-8 JSON key padded to
+a multiple of 8, and the value as a double. Entries are only ever appended
+or updated in place, and the used size is written after the entry, so a
+reader never sees a half-written entry.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+INITIAL_FILE_SIZE = 64 * 1024
+HEADER = 8
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def metrics_enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+def metrics_dir():
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        raise ImproperlyConfigured('METRICS_ENABLED needs METRICS_DIR, a directory shared by the worker processes')
+    return directory
+
+
+def _entries(data, used):
+    """(key, value offset, value) of every entry in a file's bytes"""
+    pos = HEADER
+    while pos < used:
+        [length] = struct.unpack_from('i', data, pos)
+        key_end = pos + 4 + length
+        value_pos = key_end + (-key_end % 8)
+        [value] = struct.unpack_from('d', data, value_pos)
+        yield data[pos + 4:key_end].decode('utf-8'), value_pos, value
+        pos = value_pos + 8
+
+
+class MmapFile:
+    """One process's samples: a growable memory-mapped key -> double table"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(INITIAL_FILE_SIZE)
+            size = INITIAL_FILE_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        [self._used] = struct.unpack_from('i', self._map, 0)
+        if self._used == 0:
+            self._used = HEADER
+            struct.pack_into('i', self._map, 0, self._used)
+        self._positions = {key: offset for key, offset, _ in _entries(self._map, self._used)}
+
+    def add(self, key, amount):
+        offset = self._positions.get(key)
+        if offset is None:
+            offset = self._append(key)
+        [value] = struct.unpack_from('d', self._map, offset)
+        struct.pack_into('d', self._map, offset, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        entry = struct.pack('i', len(encoded)) + encoded
+        entry += b' ' * (-len(entry) % 8) + struct.pack('d', 0.0)
+        while self._used + len(entry) > len(self._map):
+            size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self._map[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into('i', self._map, 0, self._used)
+        self._positions[key] = self._used - 8
+        return self._positions[key]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_file(path):
+    """{key: value} of a metrics file written by any process"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER:
+        return {}
+    [used] = struct.unpack_from('i', data, 0)
+    return {key: value for key, _, value in _entries(data, min(used, len(data)))}
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return [[name, str(labels[name])] for name in self.labelnames]
+
+    def samples(self, values):
+        """(suffix, labels, value) to render, from the summed values of all processes"""
+        return [('', labels, value) for labels, value in values.get(self.name, [])]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.add(self.name, self._labels(labels), amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        # Buckets are stored non-cumulatively (one write per observation) and summed up when rendered
+        bucket = next((str(le) for le in self.buckets if value <= le), '+Inf')
+        self.registry.add(f'{self.name}_bucket', labels + [['le', bucket]], 1)
+        self.registry.add(f'{self.name}_sum', labels, value)
+        self.registry.add(f'{self.name}_count', labels, 1)
+
+    def samples(self, values):
+        counts = {}
+        for labels, value in values.get(f'{self.name}_bucket', []):
+            *series, (_, le) = labels
+            counts.setdefault(tuple(series), {})[le] = value
+        sums = dict(values.get(f'{self.name}_sum', []))
+        samples = []
+        for series, count in values.get(f'{self.name}_count', []):
+            per_bucket = counts.get(series, {})
+            cumulative = 0
+            for le in [str(le) for le in self.buckets] + ['+Inf']:
+                cumulative += per_bucket.get(le, 0)
+                samples.append(('_bucket', series + (('le', le),), cumulative))
+            samples.append(('_count', series, count))
+            samples.append(('_sum', series, sums.get(series, 0)))
+        return samples
+
+
+class RatioGauge(Metric):
+    """Share of a counter's total held by some of its label values, computed at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, registry, name, documentation, counter, label, numerator, denominator):
+        super().__init__(registry, name, documentation)
+        self.counter, self.label = counter, label
+        self.numerator, self.denominator = set(numerator), set(denominator)
+
+    def samples(self, values):
+        totals = {}
+        for labels, value in values.get(self.counter.name, []):
+            outcome = dict(labels)[self.label]
+            totals[outcome] = totals.get(outcome, 0) + value
+        denominator = sum(totals.get(outcome, 0) for outcome in self.denominator)
+        if not denominator:
+            return []
+        return [('', [], sum(totals.get(outcome, 0) for outcome in self.numerator) / denominator)]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._owner = None  # (pid, directory) self._file belongs to
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def ratio(self, name, documentation, counter, label, numerator, denominator):
+        return self._register(RatioGauge(self, name, documentation, counter, label, numerator, denominator))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add(self, name, labels, amount):
+        if not metrics_enabled():
+            return
+        key = json.dumps([name, labels], ensure_ascii=False)
+        with self._lock:
+            # Forked workers (gunicorn --preload) must not share the parent's file
+            owner = (os.getpid(), metrics_dir())
+            if self._owner != owner:
+                pid, directory = owner
+                os.makedirs(directory, exist_ok=True)
+                if self._file is not None and self._owner[0] == pid:
+                    self._file.close()
+                self._file = MmapFile(os.path.join(directory, f'{pid}.db'))
+                self._owner = owner
+            self._file.add(key, amount)
+
+    def collect(self):
+        """{sample name: [(labels, value)]} summed over the files of all processes"""
+        totals = {}
+        directory = metrics_dir()
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if filename.endswith('.db'):
+                    for key, value in read_file(os.path.join(directory, filename)).items():
+                        totals[key] = totals.get(key, 0) + value
+        values = {}
+        for key, value in sorted(totals.items()):
+            name, labels = json.loads(key)
+            values.setdefault(name, []).append((tuple(tuple(label) for label in labels), value))
+        return values
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        values = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for suffix, labels, value in metric.samples(values):
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Delete every process's samples (tests, or by hand between deploys)"""
+        with self._lock:
+            if self._file is not None and self._owner[0] == os.getpid():
+                self._file.close()
+            self._file = self._owner = None
+            directory = getattr(settings, 'METRICS_DIR', None)
+            if directory and os.path.isdir(directory):
+                for filename in os.listdir(directory):
+                    if filename.endswith('.db'):
+                        os.remove(os.path.join(directory, filename))
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'Requests by route, method and status code', ('route', 'method', 'status'))
+http_errors = registry.counter(
+    'http_request_errors_total', 'Requests answered with a 5xx status', ('route', 'method'))
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'Time from the first middleware to the response', ('route', 'method'))
+questions_served = registry.counter(
+    'game_questions_served_total', 'Questions sent to players', ('source', 'lang'))
+responses_ingested = registry.counter(
+    'game_responses_ingested_total', 'Answers written to the database')
+snapshot_reloads = registry.histogram(
+    'game_snapshot_reload_seconds', 'Time to load the vocabulary snapshot from the database',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+cache_operations = registry.counter(
+    'game_cache_operations_total', 'Two-tier cache lookups and recomputes by outcome', ('outcome',))
+cache_hit_ratio = registry.ratio(
+    'game_cache_hit_ratio', 'Share of two-tier cache lookups answered by either tier',
+    cache_operations, 'outcome', numerator=('local_hits', 'shared_hits'),
+    denominator=('local_hits', 'shared_hits', 'misses'))
@@ -0,0 +1,216 @@
+"""
+Request metrics and opt-in per-request query and timing profiling
+
+MetricsMiddleware counts requests, 5xx errors and latency per route into
+core.metrics.
+
+QueryProfilingMiddleware: with REQUEST_PROFILING on, a sample of requests (REQUEST_PROFILING_SAMPLE_RATE)
+records every SQL query they run on any connection, including queries run by
+async views through sync_to_async, plus view time and response size. The
+totals go out as a Server-Timing header (visible in the browser's network
+panel) and as one JSON log line on the 'core.profiling' logger. Queries that
+repeat within a request, either verbatim or with only their parameters
+changing (the N+1 pattern), are listed in the log line, which is then logged
+as a warning.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import http_errors, http_latency, http_requests, metrics_enabled
+
+logger = logging.getLogger('core.profiling')
+
+_profile = ContextVar('core_request_profile', default=None)
+
+# Collapses `IN (%s, %s, ...)` so lookups that differ only in list length group together
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []  # (sql, params, seconds)
+
+    def add(self, sql, params, seconds):
+        self.queries.append((sql, params, seconds))
+
+    @property
+    def db_time(self):
+        return sum(seconds for _, _, seconds in self.queries)
+
+    def duplicates(self, similar_threshold):
+        """
+        Repeated queries: exact repeats (same SQL and parameters) seen twice
+        or more, and statements repeated with different parameters at least
+        `similar_threshold` times. Returns [{'sql', 'count', 'exact'}].
+        """
+        exact = Counter((sql, repr(params)) for sql, params, _ in self.queries)
+        similar = Counter(IN_LIST.sub('(...)', sql) for sql, _, _ in self.queries)
+        found = [
+            {'sql': sql, 'count': count, 'exact': True}
+            for (sql, _), count in exact.items() if count > 1
+        ]
+        exact_sql = {IN_LIST.sub('(...)', item['sql']) for item in found}
+        found += [
+            {'sql': sql, 'count': count, 'exact': False}
+            for sql, count in similar.items()
+            if count >= similar_threshold and sql not in exact_sql
+        ]
+        return sorted(found, key=lambda item: -item['count'])
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add(sql, params, time.perf_counter() - started)
+
+
+def _instrument(connection, **kwargs):
+    # Installed once per connection as the outermost wrapper: execute_wrapper()
+    # blocks pop the last wrapper on exit, so ours must never be at the end
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _instrument_open_connections():
+    for connection in connections.all(initialized_only=True):
+        _instrument(connection)
+
+
+class QueryProfilingMiddleware:
+    """
+    Add it at the top of MIDDLEWARE so view time covers the rest of the
+    stack; it removes itself unless REQUEST_PROFILING is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.similar_threshold = getattr(settings, 'REQUEST_PROFILING_SIMILAR_THRESHOLD', 3)
+        self.send_header = getattr(settings, 'REQUEST_PROFILING_HEADER', True)
+        # New connections (other threads, reconnects) pick up the wrapper when they open
+        connection_created.connect(_instrument, dispatch_uid='core.profiling')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        profile, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        self._finish(request, response, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        # The ORM runs async views' queries on the sync_to_async thread, whose
+        # connections may predate the connection_created hook
+        await sync_to_async(_instrument_open_connections)()
+        profile, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        self._finish(request, response, profile, started)
+        return response
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _start(self):
+        _instrument_open_connections()
+        profile = RequestProfile()
+        return profile, _profile.set(profile), time.perf_counter()
+
+    def _finish(self, request, response, profile, started):
+        view_ms = (time.perf_counter() - started) * 1000
+        db_ms = profile.db_time * 1000
+        size = None if response.streaming else len(response.content)
+        duplicates = profile.duplicates(self.similar_threshold)
+
+        if self.send_header:
+            timings = [
+                f'db;dur={db_ms:.2f};desc="{len(profile.queries)} queries"',
+                f'view;dur={view_ms:.2f}',
+            ]
+            if duplicates:
+                timings.append(f'dup;desc="{len(duplicates)} repeated queries"')
+            response.headers['Server-Timing'] = ', '.join(
+                filter(None, [response.headers.get('Server-Timing')] + timings)
+            )
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'db_ms': round(db_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'response_bytes': size,
+            'duplicates': duplicates,
+        }
+        logger.log(logging.WARNING if duplicates else logging.INFO, json.dumps(record, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+    """
+    Per-route request counts, errors and latency; add it near the top of
+    MIDDLEWARE. It removes itself when METRICS_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    def _record(self, request, response, started):
+        # The route pattern, not the path, keeps the label set bounded
+        match = request.resolver_match
+        route = match.route if match is not None else '<unmatched>'
+        http_requests.inc(route=route, method=request.method, status=response.status_code)
+        if response.status_code >= 500:
+            http_errors.inc(route=route, method=request.method)
+        http_latency.observe(time.perf_counter() - started, route=route, method=request.method)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+def drop_duplicate_concepts(apps, schema_editor):
+    """Keep the newest VocabularyEntry per concept before adding the unique constraint"""
+    VocabularyEntry = apps.get_model('core', 'VocabularyEntry')
+    duplicates = (
+        VocabularyEntry.objects.values('concept')
+        .annotate(keep=models.Max('id'), rows=models.Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        VocabularyEntry.objects.filter(concept=duplicate['concept']).exclude(id=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_concepts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='vocabularyentry',
+            name='concept',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:45
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Subquery, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    # One UPDATE with a correlated aggregate per counter, for the sessions that have responses
+    GameSession = apps.get_model('core', 'GameSession')
+    GameResponse = apps.get_model('core', 'GameResponse')
+    responses = GameResponse.objects.filter(session=OuterRef('pk')).order_by().values('session')
+
+    def total(aggregate):
+        return Subquery(responses.annotate(value=aggregate).values('value'))
+
+    GameSession.objects.filter(Exists(responses)).update(
+        response_count=total(Count('id')),
+        correct_count=total(Count('id', filter=Q(is_correct=True))),
+        total_response_time_ms=total(Sum('response_time_ms')),
+        min_response_time_ms=total(Min('response_time_ms')),
+        max_response_time_ms=total(Max('response_time_ms')),
+        last_activity_at=total(Max('submitted_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_vocabulary_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='max_response_time_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='min_response_time_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Answers'),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='total_response_time_ms',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_gamesession_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ConceptDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('concept', models.CharField(max_length=100)),
+                ('language', models.CharField(choices=[('ar', 'Arabic'), ('he', 'Hebrew'), ('en', 'English')], max_length=2)),
+                ('day', models.DateField()),
+                ('response_count', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('total_response_time_ms', models.PositiveBigIntegerField(default=0)),
+                ('time_histogram', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name_plural': 'Concept daily stats',
+                'indexes': [models.Index(fields=['language', 'day'], name='core_concep_languag_ec2384_idx')],
+                'unique_together': {('concept', 'language', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_catalog_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='archived_correct_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='archived_response_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='archived_response_time_ms',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
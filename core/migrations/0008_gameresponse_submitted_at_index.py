@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_gamesession_archived_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameresponse',
+            index=models.Index(fields=['submitted_at', 'id'], name='core_gamere_submitt_1ccb17_idx'),
+        ),
+    ]
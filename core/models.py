@@ -4,7 +4,7 @@ from django.core.exceptions import ValidationError
 
 
 class VocabularyEntry(models.Model):
-    concept = models.CharField(max_length=100)
+    concept = models.CharField(max_length=100, unique=True)
     hint = models.TextField(blank=True)
     arabic_text = models.CharField(max_length=255)
     hebrew_text = models.CharField(max_length=255)
@@ -30,6 +30,7 @@ class Vocabulary(models.Model):
     text = models.CharField(max_length=255)
     hint = models.TextField(blank=True)
     is_correct = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('concept', 'language')
@@ -73,6 +74,18 @@ class GameSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     language_preference = models.CharField(max_length=2, choices=Vocabulary.LANGUAGES, default='he')
 
+    # Running aggregates of the session's responses, kept up to date on submit
+    response_count = models.PositiveIntegerField(default=0, verbose_name="Answers")
+    correct_count = models.PositiveIntegerField(default=0)
+    total_response_time_ms = models.PositiveBigIntegerField(default=0)
+    min_response_time_ms = models.PositiveIntegerField(null=True, blank=True)
+    max_response_time_ms = models.PositiveIntegerField(null=True, blank=True)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    # The part of the aggregates whose responses were moved to the archive (core.archive)
+    archived_response_count = models.PositiveIntegerField(default=0)
+    archived_correct_count = models.PositiveIntegerField(default=0)
+    archived_response_time_ms = models.PositiveBigIntegerField(default=0)
+
 
 class GameResponse(models.Model):
     session = models.ForeignKey(GameSession, on_delete=models.CASCADE, related_name='responses')
@@ -85,5 +98,53 @@ class GameResponse(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['session', 'submitted_at']),
+            # Keyset pages of a time window across sessions (GameResponseListView)
+            models.Index(fields=['submitted_at', 'id']),
             models.Index(fields=['is_correct']),
         ]
+
+
+class ConceptDailyStats(models.Model):
+    """
+    Per-concept, per-language and per-day rollup of GameResponse
+
+    Maintained incrementally by core.rollups; response times are kept as a
+    fixed-bucket histogram so days can be merged and percentiles estimated
+    without going back to the raw responses.
+    """
+    concept = models.CharField(max_length=100)
+    language = models.CharField(max_length=2, choices=Vocabulary.LANGUAGES)
+    day = models.DateField()
+    response_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    total_response_time_ms = models.PositiveBigIntegerField(default=0)
+    time_histogram = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ('concept', 'language', 'day')
+        indexes = [
+            models.Index(fields=['language', 'day']),
+        ]
+        verbose_name_plural = "Concept daily stats"
+
+    def __str__(self):
+        return f"{self.concept} ({self.language}) {self.day}"
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark (last processed id) of an incremental rollup"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only log of VocabularyEntry changes; the newest id is the catalog version
+
+    Fed by the VocabularyEntry signals and by the bulk sync/import paths, and
+    read by the catalog endpoint to answer `?since=<version>` with a delta.
+    """
+    entry_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,71 @@
+"""
+Chunked purge of abandoned GameSession rows
+
+Every GET without a session_id creates a GameSession in 'db' mode and most
+of them never submit. QuerySet.delete() would run them through the cascade
+collector; here ids are picked with an index-friendly keyset query and
+deleted with raw DELETE statements of bounded size, each in its own short
+transaction. The batch shrinks whenever one DELETE holds the write lock
+longer than `max_lock_ms` and grows back while deletes stay fast.
+"""
+import time
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import GameResponse, GameSession
+
+PurgeResult = namedtuple('PurgeResult', ['deleted', 'batches', 'elapsed', 'longest_batch_ms'])
+
+
+def abandoned_sessions(older_than):
+    """Sessions created before `older_than` that never recorded a response"""
+    return GameSession.objects.filter(created_at__lt=older_than, response_count=0).filter(
+        ~Exists(GameResponse.objects.filter(session=OuterRef('pk')))
+    )
+
+
+def _delete_batch(ids):
+    session_table = GameSession._meta.db_table
+    response_table = GameResponse._meta.db_table
+    placeholders = ', '.join(['%s'] * len(ids))
+    # Re-check in the DELETE itself so a session that answered since it was picked survives
+    sql = (
+        f'DELETE FROM {session_table} WHERE id IN ({placeholders}) AND response_count = 0 '
+        f'AND NOT EXISTS (SELECT 1 FROM {response_table} WHERE {response_table}.session_id = {session_table}.id)'
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, ids)
+            return cursor.rowcount
+
+
+def purge_abandoned_sessions(older_than, batch_size=1000, max_lock_ms=100, pause=0.05, max_batches=None):
+    """Delete abandoned sessions in raw batches; returns a PurgeResult"""
+    started = time.monotonic()
+    size = batch_size
+    deleted = batches = 0
+    longest = 0.0
+    last_id = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            abandoned_sessions(older_than).filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        batch_started = time.monotonic()
+        deleted += _delete_batch(ids)
+        batch_ms = (time.monotonic() - batch_started) * 1000
+        longest = max(longest, batch_ms)
+        batches += 1
+
+        if batch_ms > max_lock_ms:
+            size = max(1, size // 2)
+        elif batch_ms < max_lock_ms / 4:
+            size = min(batch_size, size * 2)
+        if pause:
+            time.sleep(pause)
+    return PurgeResult(deleted, batches, time.monotonic() - started, round(longest, 1))
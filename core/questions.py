@@ -0,0 +1,35 @@
+import random
+
+
+def build_questions(entries, lang, distractors):
+    """Build the multiple-choice `questions` payload for the given entries"""
+    questions = []
+    for entry in entries:
+        # Get question text in the requested language
+        question_text = entry.hebrew_text if lang == 'he' else entry.arabic_text
+
+        # Get correct answer in opposite language
+        correct_answer_text = entry.arabic_text if lang == 'he' else entry.hebrew_text
+
+        # Select 3 incorrect options in opposite language
+        answer_lang = 'he' if lang == 'ar' else 'ar'
+        incorrect = distractors.pick(entry, answer_lang, 3)
+
+        # Combine correct and incorrect answers
+        correct_answer = {
+            'id': f'correct_{entry.id}',
+            'text': correct_answer_text
+        }
+        options = [correct_answer] + [
+            {'id': f'incorrect_{i}', 'text': text} for i, text in enumerate(incorrect)
+        ]
+        random.shuffle(options)
+
+        questions.append({
+            'question': question_text,
+            'options': options,
+            'answer': correct_answer['id'],
+            'concept': entry.concept  # Add concept for response submission
+        })
+
+    return questions
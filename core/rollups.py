@@ -0,0 +1,182 @@
+"""
+Incremental per-concept difficulty rollups built from GameResponse
+
+New responses are read past a high-water mark (the last processed id),
+aggregated per (concept, language, day) in memory and merged into
+ConceptDailyStats, so the cost of a run depends on what arrived since the
+previous one and never on the size of the response table.
+"""
+import bisect
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import game_cache
+from .models import ConceptDailyStats, GameResponse, RollupCheckpoint
+
+CHECKPOINT_NAME = 'concept_daily_stats'
+
+# Upper bounds (ms) of the response-time histogram buckets; the last bucket is open-ended
+TIME_BUCKETS = [250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 20000, 30000]
+
+
+def bucket_index(response_time_ms):
+    return bisect.bisect_left(TIME_BUCKETS, response_time_ms)
+
+
+def merge_histograms(*histograms):
+    merged = [0] * (len(TIME_BUCKETS) + 1)
+    for histogram in histograms:
+        for i, count in enumerate(histogram):
+            merged[i] += count
+    return merged
+
+
+def histogram_percentile(histogram, pct):
+    """Estimate a percentile (0-100) by interpolating inside the bucket that holds it"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = total * pct / 100
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = TIME_BUCKETS[i - 1] if i else 0
+            upper = TIME_BUCKETS[i] if i < len(TIME_BUCKETS) else lower * 2
+            return round(lower + (upper - lower) * (rank - seen) / count)
+        seen += count
+    return TIME_BUCKETS[-1]
+
+
+def summarize(response_count, correct_count, total_response_time_ms, histogram):
+    """Read-side numbers for one concept: count, correct ratio, mean and p50/p90 response time"""
+    return {
+        'responses': response_count,
+        'correct_ratio': round(correct_count / response_count, 4) if response_count else None,
+        'mean_response_time_ms': round(total_response_time_ms / response_count) if response_count else None,
+        'p50_response_time_ms': histogram_percentile(histogram, 50),
+        'p90_response_time_ms': histogram_percentile(histogram, 90),
+    }
+
+
+def _aggregate(rows):
+    buckets = {}
+    for _, concept, language, is_correct, response_time_ms, submitted_at in rows:
+        key = (concept, language, timezone.localtime(submitted_at).date())
+        stats = buckets.get(key)
+        if stats is None:
+            stats = buckets[key] = [0, 0, 0, [0] * (len(TIME_BUCKETS) + 1)]
+        stats[0] += 1
+        stats[1] += bool(is_correct)
+        stats[2] += response_time_ms
+        stats[3][bucket_index(response_time_ms)] += 1
+    return buckets
+
+
+def _merge_chunk(buckets):
+    """Add aggregated buckets into ConceptDailyStats with one read and two bulk writes"""
+    concepts = {concept for concept, _, _ in buckets}
+    days = {day for _, _, day in buckets}
+    existing = {
+        (stats.concept, stats.language, stats.day): stats
+        for stats in ConceptDailyStats.objects.filter(concept__in=concepts, day__in=days)
+    }
+
+    to_create = []
+    to_update = []
+    for key, (count, correct, total_time, histogram) in buckets.items():
+        stats = existing.get(key)
+        if stats is None:
+            concept, language, day = key
+            to_create.append(ConceptDailyStats(
+                concept=concept, language=language, day=day, response_count=count,
+                correct_count=correct, total_response_time_ms=total_time, time_histogram=histogram,
+            ))
+        else:
+            stats.response_count += count
+            stats.correct_count += correct
+            stats.total_response_time_ms += total_time
+            stats.time_histogram = merge_histograms(stats.time_histogram, histogram)
+            to_update.append(stats)
+
+    ConceptDailyStats.objects.bulk_create(to_create)
+    ConceptDailyStats.objects.bulk_update(
+        to_update, ['response_count', 'correct_count', 'total_response_time_ms', 'time_histogram']
+    )
+
+
+def roll_up_responses(chunk_size=5000, max_chunks=None):
+    """
+    Fold responses newer than the checkpoint into ConceptDailyStats
+
+    Every chunk is merged and the checkpoint advanced in the same transaction,
+    so an interrupted run resumes exactly where it stopped. Returns the
+    number of responses processed.
+    """
+    processed = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        with transaction.atomic():
+            checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+            rows = list(
+                GameResponse.objects.filter(id__gt=checkpoint.last_id)
+                .order_by('id')
+                .values_list('id', 'concept', 'session__language_preference', 'is_correct',
+                             'response_time_ms', 'submitted_at')[:chunk_size]
+            )
+            if not rows:
+                break
+            _merge_chunk(_aggregate(rows))
+            checkpoint.last_id = rows[-1][0]
+            checkpoint.save(update_fields=['last_id', 'updated_at'])
+
+        processed += len(rows)
+        chunks += 1
+    if processed:
+        game_cache.bump('rollups')
+    return processed
+
+
+def reset_rollups():
+    """Drop all rollups and the checkpoint so the next run backfills from the first response"""
+    with transaction.atomic():
+        ConceptDailyStats.objects.all().delete()
+        RollupCheckpoint.objects.filter(name=CHECKPOINT_NAME).delete()
+    game_cache.bump('rollups')
+
+
+def concept_stats(language=None, since=None, until=None, concept=None):
+    """Merge daily rollups into one summary per (concept, language)"""
+    queryset = ConceptDailyStats.objects.all()
+    if language:
+        queryset = queryset.filter(language=language)
+    if since:
+        queryset = queryset.filter(day__gte=since)
+    if until:
+        queryset = queryset.filter(day__lte=until)
+    if concept:
+        queryset = queryset.filter(concept=concept)
+
+    merged = {}
+    for stats in queryset.order_by('concept', 'language').iterator():
+        totals = merged.setdefault((stats.concept, stats.language), [0, 0, 0, []])
+        totals[0] += stats.response_count
+        totals[1] += stats.correct_count
+        totals[2] += stats.total_response_time_ms
+        totals[3] = merge_histograms(totals[3], stats.time_histogram)
+
+    return [
+        {'concept': concept, 'language': language, **summarize(*totals)}
+        for (concept, language), totals in merged.items()
+    ]
+
+
+def cached_concept_stats(language=None, since=None, until=None, concept=None):
+    """concept_stats() cached until the next rollup run"""
+    key = game_cache.key('rollups', f'stats:{language}:{since}:{until}:{concept}')
+    return game_cache.get_or_set(
+        key,
+        lambda: concept_stats(language=language, since=since, until=until, concept=concept),
+        timeout=getattr(settings, 'GAME_STATS_CACHE_TIMEOUT', 300),
+    )
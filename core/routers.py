@@ -0,0 +1,77 @@
+"""
+Read/write split for the database
+
+Everything goes to the primary ('default') unless it runs inside
+read_replica(), which sends reads to DATABASE_READ_ALIAS. Opting in per code
+path instead of per model keeps read-your-writes for submits, imports and
+anything else that reads what it just wrote, while the read-heavy paths
+(vocabulary snapshots, catalog, stats, admin changelists) leave the primary
+to the writers.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+_read_only = ContextVar('core_read_only', default=False)
+
+
+def read_database():
+    """Alias that read-only work should use"""
+    return getattr(settings, 'DATABASE_READ_ALIAS', 'default')
+
+
+class read_replica(ContextDecorator):
+    """Route reads in this block (or decorated function) to the read alias"""
+
+    def _recreate_cm(self):
+        # A fresh instance per call, so a decorated function is safe across threads
+        return type(self)()
+
+    def __enter__(self):
+        self._token = _read_only.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _read_only.reset(self._token)
+        return False
+
+
+class ReadWriteRouter:
+    def db_for_read(self, model, **hints):
+        if _read_only.get():
+            return read_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+
+def refresh_sqlite_replica(source='default', target=None):
+    """
+    Copy the primary SQLite database into the replica with SQLite's online
+    backup API; readers of the replica see the copy once it completes
+    """
+    target = target or read_database()
+    if target == source:
+        raise ValueError("The replica must be a different database than the primary")
+    for alias in (source, target):
+        if connections[alias].vendor != 'sqlite':
+            raise ValueError(f"Database '{alias}' is not SQLite; replicate it with the database's own tooling")
+        connections[alias].ensure_connection()
+    connections[source].connection.backup(connections[target].connection, pages=1024)
+
+
+def sqlite_pragmas(alias='default'):
+    """The tuning pragmas in effect on a connection, as set by its init_command"""
+    with connections[alias].cursor() as cursor:
+        values = {}
+        for pragma in ('journal_mode', 'synchronous', 'busy_timeout'):
+            cursor.execute(f'PRAGMA {pragma}')
+            values[pragma] = cursor.fetchone()[0]
+        return values
@@ -0,0 +1,78 @@
+import logging
+import math
+import random
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Max, Min
+
+from .models import VocabularyEntry
+from .routers import read_replica
+from .snapshot import SnapshotEntry
+
+logger = logging.getLogger(__name__)
+
+EntrySample = namedtuple('EntrySample', ['entries', 'extra', 'total'])
+
+
+def _fetch(ids):
+    rows = VocabularyEntry.objects.order_by().filter(id__in=ids).values_list(*SnapshotEntry._fields)
+    return [SnapshotEntry(*row) for row in rows]
+
+
+def _exact_sample(needed):
+    """The original path: load every row and sample in Python"""
+    rows = VocabularyEntry.objects.order_by().values_list(*SnapshotEntry._fields)
+    entries = [SnapshotEntry(*row) for row in rows]
+    return random.sample(entries, min(needed, len(entries)))
+
+
+@read_replica()
+def sample_entries(n, extra=0):
+    """
+    Return n random vocabulary entries plus up to `extra` other ones
+
+    Small tables use the exact path. Larger ones draw random ids between the
+    smallest and largest id and keep the ones that exist, oversampling by the
+    id density so gaps left by deletes only cost a slightly larger IN query.
+    Every existing row is equally likely to be picked. If the id range is too
+    sparse to fill the sample in GAME_SAMPLING_MAX_ROUNDS rounds the exact path
+    is used instead.
+    """
+    stats = VocabularyEntry.objects.order_by().aggregate(
+        total=Count('id'), low=Min('id'), high=Max('id')
+    )
+    total = stats['total']
+    if total < n:
+        return EntrySample([], [], total)
+
+    needed = min(n + extra, total)
+    if total <= getattr(settings, 'GAME_SAMPLING_EXACT_THRESHOLD', 1000):
+        picked = _exact_sample(needed)
+        return EntrySample(picked[:n], picked[n:], total)
+
+    span = stats['high'] - stats['low'] + 1
+    density = total / span
+    tried = set()
+    picked = []
+    for _ in range(getattr(settings, 'GAME_SAMPLING_MAX_ROUNDS', 4)):
+        missing = needed - len(picked)
+        draw = min(math.ceil(missing / density * 1.25) + 4, span - len(tried))
+        ids = set()
+        while len(ids) < draw:
+            candidate = random.randint(stats['low'], stats['high'])
+            if candidate not in tried:
+                ids.add(candidate)
+        tried |= ids
+        picked.extend(_fetch(ids))
+        if len(picked) >= needed:
+            random.shuffle(picked)
+            picked = picked[:needed]
+            return EntrySample(picked[:n], picked[n:], total)
+
+    logger.warning(
+        "Vocabulary ids are too sparse for id sampling (%d rows over %d ids), using exact path",
+        total, span,
+    )
+    picked = _exact_sample(needed)
+    return EntrySample(picked[:n], picked[n:], total)
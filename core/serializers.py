@@ -22,8 +22,10 @@ class VocabularySerializer(serializers.ModelSerializer):
 class GameSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameSession
-        fields = ['id', 'session_id', 'created_at', 'language_preference']
-        read_only_fields = ('created_at',) # 'created_at' is auto_now_add
+        fields = ['id', 'session_id', 'created_at', 'language_preference', 'response_count', 'correct_count',
+                  'total_response_time_ms', 'min_response_time_ms', 'max_response_time_ms', 'last_activity_at']
+        read_only_fields = ('created_at', 'response_count', 'correct_count', 'total_response_time_ms',
+                            'min_response_time_ms', 'max_response_time_ms', 'last_activity_at')
 
 class GameResponseSerializer(serializers.ModelSerializer):
     # By default, the 'session' ForeignKey will be represented by its primary key.
@@ -37,4 +39,12 @@ class GameResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameResponse
         fields = ['id', 'session', 'concept', 'selected_text', 'is_correct', 'response_time_ms', 'submitted_at']
-        read_only_fields = ('submitted_at',) # 'submitted_at' is auto_now_add
\ No newline at end of file
+        read_only_fields = ('submitted_at',) # 'submitted_at' is auto_now_add
+
+
+class GameResponseSubmitSerializer(serializers.ModelSerializer):
+    """A single answer in a submit payload; the session comes from the request"""
+
+    class Meta:
+        model = GameResponse
+        fields = ['concept', 'selected_text', 'is_correct', 'response_time_ms']
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.game-session'
+
+
+def make_session_token(session_id, lang):
+    """Return a signed token carrying the session id and language preference"""
+    return signing.dumps({'sid': session_id, 'lang': lang}, salt=TOKEN_SALT, compress=True)
+
+
+def read_session_token(token):
+    """Return (session_id, lang) from a token, or None if it is forged or expired"""
+    try:
+        data = signing.loads(
+            token,
+            salt=TOKEN_SALT,
+            max_age=getattr(settings, 'GAME_SESSION_TOKEN_MAX_AGE', 7 * 24 * 3600)
+        )
+    except signing.BadSignature:
+        return None
+    return data['sid'], data['lang']
@@ -1,34 +1,32 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from core.catalog import record_entry_changes
 from core.models import Vocabulary, VocabularyEntry
+from core.snapshot import bump_vocabulary_version
+from core.sync import schedule_entry_sync
 
 
 @receiver(post_save, sender=Vocabulary)
 def sync_vocabulary_entry(sender, instance, **kwargs):
-    """Automatically sync Vocabulary changes to VocabularyEntry"""
+    """Sync Vocabulary changes to VocabularyEntry once the transaction commits"""
     if instance.is_correct and instance.language in ['ar', 'he']:
-        try:
-            # Get the other language translation
-            other_lang = 'he' if instance.language == 'ar' else 'ar'
-            other_trans = Vocabulary.objects.get(
-                concept=instance.concept,
-                language=other_lang,
-                is_correct=True
-            )
-
-            # Prepare update data
-            update_data = {
-                'hint': instance.hint or other_trans.hint or '',
-                f'{instance.language}_text': instance.text,
-                f'{other_lang}_text': other_trans.text
-            }
-
-            # Update or create VocabularyEntry
-            VocabularyEntry.objects.update_or_create(
-                concept=instance.concept,
-                defaults=update_data
-            )
-        except Vocabulary.DoesNotExist:
-            pass  # Wait until both translations exist
-        except Exception as e:
-            print(f"Error syncing VocabularyEntry: {str(e)}")
\ No newline at end of file
+        schedule_entry_sync(instance.concept)
+
+
+@receiver(post_save, sender=VocabularyEntry)
+@receiver(post_delete, sender=VocabularyEntry)
+def invalidate_vocabulary_snapshot(sender, **kwargs):
+    """Bump the vocabulary version once the change is committed"""
+    transaction.on_commit(bump_vocabulary_version)
+
+
+@receiver(post_save, sender=VocabularyEntry)
+def log_catalog_upsert(sender, instance, **kwargs):
+    """Record the change in the catalog log, in the same transaction as the save"""
+    record_entry_changes([instance.pk])
+
+
+@receiver(post_delete, sender=VocabularyEntry)
+def log_catalog_delete(sender, instance, **kwargs):
+    record_entry_changes([instance.pk], deleted=True)
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .caching import game_cache
+from .distractors import DistractorIndex
+from .metrics import snapshot_reloads
+from .models import VocabularyEntry
+from .routers import read_replica
+
+VERSION_NAMESPACE = 'vocabulary'
+
+SnapshotEntry = namedtuple('SnapshotEntry', ['id', 'concept', 'arabic_text', 'hebrew_text'])
+
+
+def get_vocabulary_version():
+    """Return the vocabulary version shared by all workers"""
+    return game_cache.version(VERSION_NAMESPACE)
+
+
+async def aget_vocabulary_version():
+    """Async version of get_vocabulary_version()"""
+    return await game_cache.aversion(VERSION_NAMESPACE)
+
+
+def bump_vocabulary_version():
+    """Mark every loaded snapshot, and everything cached under the vocabulary namespace, as stale"""
+    return game_cache.bump(VERSION_NAMESPACE)
+
+
+class VocabularySnapshot:
+    """
+    Immutable, in-memory copy of the VocabularyEntry table for one version
+    """
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+        self.by_concept = {entry.concept: entry for entry in entries}
+        self.distractors = DistractorIndex(entries)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, version):
+        with read_replica():
+            rows = VocabularyEntry.objects.order_by('id').values_list(*SnapshotEntry._fields)
+            return cls(version, tuple(SnapshotEntry(*row) for row in rows))
+
+    def is_current(self, version):
+        max_age = getattr(settings, 'GAME_SNAPSHOT_MAX_AGE', 300)
+        return self.version == version and time.monotonic() - self.loaded_at < max_age
+
+    def sample(self, n):
+        return random.sample(self.entries, n)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Return the process-local snapshot, reloading it if the version moved on"""
+    # Read the version before loading so a concurrent bump triggers another reload
+    version = get_vocabulary_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+
+    return _reload_snapshot(version)
+
+
+async def aget_snapshot():
+    """Async version of get_snapshot(); only a reload leaves the event loop"""
+    version = await aget_vocabulary_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+    return await sync_to_async(_reload_snapshot)(version)
+
+
+def _reload_snapshot(version):
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None or not _snapshot.is_current(version):
+            started = time.perf_counter()
+            _snapshot = VocabularySnapshot.load(version)
+            snapshot_reloads.observe(time.perf_counter() - started)
+        return _snapshot
+
+
+def clear_snapshot():
+    """Drop the process-local snapshot (used by tests)"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
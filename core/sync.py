@@ -0,0 +1,135 @@
+"""
+Set-based reconciliation of VocabularyEntry with its Vocabulary translations
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .catalog import record_bulk_upserts
+from .models import Vocabulary, VocabularyEntry
+from .snapshot import bump_vocabulary_version
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+_local = threading.local()
+
+
+def paired_translations(concepts=None):
+    """
+    (concept, hint, arabic_text, hebrew_text) for every concept with correct
+    Arabic and Hebrew translations, in one query
+    """
+    hebrew = Vocabulary.objects.filter(concept=OuterRef('concept'), language='he', is_correct=True)
+    queryset = (
+        Vocabulary.objects.filter(language='ar', is_correct=True)
+        .annotate(
+            hebrew_text=Subquery(hebrew.values('text')[:1]),
+            hebrew_hint=Subquery(hebrew.values('hint')[:1]),
+        )
+        .filter(hebrew_text__isnull=False)
+        .order_by('concept')
+    )
+    if concepts is not None:
+        queryset = queryset.filter(concept__in=concepts)
+
+    for concept, arabic_text, arabic_hint, hebrew_text, hebrew_hint in queryset.values_list(
+        'concept', 'text', 'hint', 'hebrew_text', 'hebrew_hint'
+    ):
+        yield concept, arabic_hint or hebrew_hint or '', arabic_text, hebrew_text
+
+
+def plan_entry_changes(pairs, existing):
+    """
+    Diff paired translations against existing entries
+
+    `existing` maps concept -> (id, hint, arabic_text, hebrew_text). Returns
+    the unsaved entries to create and the entries (with ids) to update; rows
+    that already match are left out.
+    """
+    to_create = []
+    to_update = []
+    for concept, hint, arabic_text, hebrew_text in pairs:
+        current = existing.get(concept)
+        if current is None:
+            to_create.append(VocabularyEntry(
+                concept=concept, hint=hint, arabic_text=arabic_text, hebrew_text=hebrew_text
+            ))
+        elif current[1:] != (hint, arabic_text, hebrew_text):
+            to_update.append(VocabularyEntry(
+                id=current[0], concept=concept, hint=hint, arabic_text=arabic_text, hebrew_text=hebrew_text
+            ))
+    return to_create, to_update
+
+
+def reconcile_concepts(concepts):
+    """Upsert the VocabularyEntry rows of the given concepts from their translations"""
+    concepts = sorted(set(concepts))
+    synced = 0
+    for start in range(0, len(concepts), CHUNK_SIZE):
+        entries = [
+            VocabularyEntry(concept=concept, hint=hint, arabic_text=arabic_text, hebrew_text=hebrew_text)
+            for concept, hint, arabic_text, hebrew_text in paired_translations(concepts[start:start + CHUNK_SIZE])
+        ]
+        VocabularyEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['concept'],
+            update_fields=['hint', 'arabic_text', 'hebrew_text'],
+        )
+        record_bulk_upserts(entries)
+        synced += len(entries)
+
+    if synced:
+        # bulk_create sends no post_save, so invalidate the snapshot here
+        transaction.on_commit(bump_vocabulary_version)
+    return synced
+
+
+def _pending():
+    if not hasattr(_local, 'pending'):
+        _local.pending = set()
+        _local.deferred = 0
+    return _local.pending
+
+
+def _flush_pending():
+    concepts = _pending().copy()
+    _local.pending.clear()
+    if concepts:
+        reconcile_concepts(concepts)
+
+
+def schedule_entry_sync(concept):
+    """
+    Reconcile `concept` once the current transaction commits
+
+    Every concept touched in a transaction is collected and reconciled in one
+    pass by whichever on_commit callback runs first; the others find nothing
+    left to do. Concepts left over from a rolled back transaction are simply
+    reconciled with the next one, which is harmless because reconciling only
+    reads committed state.
+    """
+    _pending().add(concept)
+    if not _local.deferred:
+        transaction.on_commit(_flush_pending, robust=True)
+
+
+@contextmanager
+def deferred_entry_sync():
+    """
+    Suspend per-save syncing for a bulk operation and reconcile everything it
+    touched once at the end (after commit when inside a transaction)
+    """
+    _pending()
+    _local.deferred += 1
+    try:
+        yield
+    finally:
+        _local.deferred -= 1
+        if not _local.deferred:
+            transaction.on_commit(_flush_pending, robust=True)
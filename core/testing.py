@@ -0,0 +1,31 @@
+"""
+Test runner that keeps the suite away from the shared cache of running servers
+
+The tests clear and fill CACHES['default'] (decks, vocabulary versions,
+session mastery) and write metrics, so for the duration of the run the cache
+LOCATION and METRICS_DIR point into a fresh temporary directory instead of
+the configured ones.
+"""
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.workdir = tempfile.mkdtemp(prefix='simsim-tests-')
+        caches = copy.deepcopy(settings.CACHES)
+        caches['default']['LOCATION'] = os.path.join(self.workdir, 'cache')
+        self.isolation = override_settings(CACHES=caches, METRICS_DIR=os.path.join(self.workdir, 'metrics'))
+        self.isolation.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolation.disable()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
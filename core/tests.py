@@ -1,83 +1,1133 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+
+from django.apps import apps
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import CommandError
+from django.db import connection, transaction
 from django.core.exceptions import ValidationError
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
-from .models import VocabularyEntry, Word, Player, Score
-from rest_framework import status
-from rest_framework.test import APIClient
+from .models import VocabularyEntry
+from .models import GameSession, GameResponse, Vocabulary, ConceptDailyStats, RollupCheckpoint
+from .archive import archive_responses, load_archive
+from .benchmark import compare, percentile, run_load, seed_entries
+from .caching import TwoTierCache, atomic_add, atomic_incr, game_cache
+from .catalog import catalog_version
+from .purge import purge_abandoned_sessions
+from .routers import read_replica, sqlite_pragmas
+from .decks import generate_decks, pool_size, pop_deck
+from .distractors import DistractorIndex
+from .importers import VocabularyImporter
+from .ingest import ResponseBuffer, save_responses
+from .metrics import MmapFile, read_file, registry, responses_ingested
+from .middleware import RequestProfile, _record_query
+from .mastery import apply_answers, get_mastery
+from .rollups import roll_up_responses
+from .sampling import sample_entries
+from .validation import validate_length_rule
+from .sync import deferred_entry_sync, reconcile_concepts
+from .snapshot import SnapshotEntry, get_snapshot, clear_snapshot, bump_vocabulary_version, get_vocabulary_version
 
 # model validation test
-class WordValidationTest(TestCase):
+class VocabularyValidationTest(TestCase):
     def test_hebrew_and_arabic_same_length(self):
-        entry = VocabularyEntry.objects.create(arabic_text="مرحبا")
-        
-        # Hebrew translation with same length
-        correct_word = Word(entry=entry, text="שלום", is_correct=True)
+        Vocabulary.objects.create(concept="hello", language='ar', text="مرحبا", is_correct=True)
+
+        # Hebrew translation with a different length
+        hebrew = Vocabulary(concept="hello", language='he', text="שלום", is_correct=True)
         with self.assertRaises(ValidationError):
-            correct_word.full_clean()
+            hebrew.full_clean()
+
+        hebrew.text = "שלומי"
+        hebrew.full_clean()
 
 
-class QuizAPITestCase(TestCase):
+class VocabularySnapshotTest(TestCase):
     def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
         self.client = APIClient()
+        for i in range(6):
+            VocabularyEntry.objects.create(
+                concept=f"concept{i}", arabic_text=f"عربي{i}", hebrew_text=f"עברית{i}"
+            )
 
-        # Create multiple entries
-        for i in range(5):
-            entry = VocabularyEntry.objects.create(arabic_text=f"كلمة{i}")
-            Word.objects.create(text=f"hebrew{i}", language='he', entry=entry)
-            Word.objects.create(text=f"arabic{i}", language='ar', entry=entry)
+    def test_snapshot_is_reused_until_vocabulary_changes(self):
+        first = get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(get_snapshot(), first)
 
-    def test_quiz_api_returns_question(self):
-        response = self.client.get(reverse('quiz-question'))
+        with self.captureOnCommitCallbacks(execute=True):
+            VocabularyEntry.objects.create(concept="new", arabic_text="جديد", hebrew_text="חדש")
+
+        second = get_snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second), 7)
+
+    def test_game_vocabulary_does_not_scan_table_per_question(self):
+        get_snapshot()
+        # Only the session insert hits the database
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('game-vocabulary'), {'N': 5})
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['questions']), 5)
 
-        data = response.json()
-        self.assertIn('question_word', data)
-        self.assertIn('question_language', data)
-        self.assertIn('options', data)
 
-        self.assertIsInstance(data['options'], list)
-        self.assertEqual(len(data['options']), 4)
+class DistractorIndexTest(TestCase):
+    @override_settings(GAME_DISTRACTOR_MIN_POOL=3)
+    def test_picks_distinct_wrong_answers_of_matching_length(self):
+        entries = [
+            SnapshotEntry(i, f"concept{i}", text, text)
+            for i, text in enumerate(["aaa", "bbb", "ccc", "ddd", "eeee", "aaa", "ffffff"])
+        ]
+        index = DistractorIndex(entries)
+
+        picked = index.pick(entries[0], 'ar', 3)
+        self.assertEqual(len(picked), 3)
+        self.assertEqual(len(set(picked)), 3)
+        self.assertNotIn("aaa", picked)
+        self.assertTrue(all(len(text) == 3 for text in picked))
+
+    def test_small_vocabulary_returns_what_it_can(self):
+        entries = [SnapshotEntry(1, "a", "x", "x"), SnapshotEntry(2, "b", "y", "y")]
+        self.assertEqual(DistractorIndex(entries).pick(entries[0], 'he', 3), ["y"])
+
+
+@override_settings(GAME_SNAPSHOT_ENABLED=False, GAME_SAMPLING_EXACT_THRESHOLD=10)
+class EntrySamplingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        VocabularyEntry.objects.bulk_create(
+            VocabularyEntry(concept=f"concept{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+            for i in range(60)
+        )
+        # Leave gaps in the id range
+        VocabularyEntry.objects.filter(concept__endswith="3").delete()
+
+    def test_samples_distinct_existing_entries_across_id_gaps(self):
+        sample = sample_entries(5, extra=20)
+        ids = [entry.id for entry in sample.entries + sample.extra]
+        self.assertEqual(sample.total, 54)
+        self.assertEqual(len(sample.entries), 5)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(VocabularyEntry.objects.filter(id__in=ids).count(), 25)
+
+    def test_not_enough_vocabulary(self):
+        sample = sample_entries(100)
+        self.assertEqual(sample.entries, [])
+        self.assertEqual(sample.total, 54)
+
+    def test_game_vocabulary_without_snapshot(self):
+        response = self.client.get(reverse('game-vocabulary'), {'N': 5, 'LANG': 'ar'})
+        self.assertEqual(response.status_code, 200)
+        for question in response.json()['questions']:
+            self.assertEqual(len(question['options']), 4)
+
+    def test_question_count_must_be_in_range(self):
+        for snapshot_enabled in (False, True):
+            with self.subTest(snapshot_enabled=snapshot_enabled), \
+                    override_settings(GAME_SNAPSHOT_ENABLED=snapshot_enabled, GAME_MAX_QUESTIONS=20):
+                for n in (-1, 0, 21):
+                    response = self.client.get(reverse('game-vocabulary'), {'N': n})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json()['error'], 'N must be between 1 and 20')
+
+
+class SubmitGameTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.session = GameSession.objects.create(session_id="s1")
+
+    def _answer(self, **overrides):
+        answer = {'concept': 'water', 'selected_text': 'מים', 'is_correct': True, 'response_time_ms': 900}
+        answer.update(overrides)
+        return answer
+
+    def test_saves_all_responses_in_one_insert(self):
+        payload = {'session_id': 's1', 'responses': [self._answer() for _ in range(20)]}
+        # Session lookup, then one INSERT and the counter UPDATE inside a savepoint
+        # (the test itself runs in a transaction)
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('submit-game'), payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(GameResponse.objects.filter(session=self.session).count(), 20)
+
+    def test_malformed_payload_writes_nothing(self):
+        payload = {'session_id': 's1', 'responses': [self._answer(), self._answer(response_time_ms='slow')]}
+        response = self.client.post(reverse('submit-game'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('details', response.json())
+        self.assertFalse(GameResponse.objects.exists())
+
+    @override_settings(GAME_SUBMIT_MAX_RESPONSES=2)
+    def test_rejects_oversized_batch(self):
+        payload = {'session_id': 's1', 'responses': [self._answer() for _ in range(3)]}
+        response = self.client.post(reverse('submit-game'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GameResponse.objects.exists())
+
+
+class ResponseBufferTest(TransactionTestCase):
+    def setUp(self):
+        self.session = GameSession.objects.create(session_id="s1")
+
+    def _rows(self, count):
+        return [
+            GameResponse(session=self.session, concept='water', selected_text='מים',
+                         is_correct=True, response_time_ms=500)
+            for _ in range(count)
+        ]
+
+    def test_flushes_on_batch_size_and_on_stop(self):
+        buffer = ResponseBuffer(max_size=100, batch_size=5, interval=60)
+        buffer.start()
+        self.assertTrue(buffer.offer(self._rows(5)))
+        for _ in range(50):
+            if buffer.stats()['flushed'] == 5:
+                break
+            time.sleep(0.02)
+        self.assertEqual(GameResponse.objects.count(), 5)
+
+        self.assertTrue(buffer.offer(self._rows(2)))
+        buffer.stop()
+        self.assertEqual(GameResponse.objects.count(), 7)
+        self.assertEqual(buffer.stats(), {'queued': 7, 'flushed': 7, 'dropped': 0, 'pending': 0})
+
+    def test_rejects_when_full(self):
+        buffer = ResponseBuffer(max_size=3, batch_size=10, interval=60)
+        self.assertTrue(buffer.offer(self._rows(2)))
+        self.assertFalse(buffer.offer(self._rows(2), timeout=0.01))
+        self.assertEqual(buffer.stats()['dropped'], 2)
+
+
+@override_settings(GAME_SESSION_MODE='signed')
+class SignedSessionTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        self.client = APIClient()
+        for i in range(4):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+        get_snapshot()
+
+    def test_get_issues_token_without_database_access(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('game-vocabulary'), {'N': 2, 'LANG': 'ar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(GameSession.objects.exists())
+
+        token = response.json()['session_id']
+        with self.assertNumQueries(0):
+            again = self.client.get(reverse('game-vocabulary'), {'N': 2, 'session_id': token})
+        self.assertEqual(again.json()['session_id'], token)
+
+    def test_session_row_created_on_first_submit(self):
+        token = self.client.get(reverse('game-vocabulary'), {'N': 2, 'LANG': 'ar'}).json()['session_id']
+        answer = {'concept': 'c1', 'selected_text': 'ע1', 'is_correct': True, 'response_time_ms': 700}
+        response = self.client.post(reverse('submit-game'), {'session_id': token, 'responses': [answer]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        session = GameSession.objects.get()
+        self.assertEqual(session.language_preference, 'ar')
+        self.assertEqual(session.responses.count(), 1)
+
+    def test_forged_token_is_rejected(self):
+        response = self.client.post(reverse('submit-game'), {'session_id': 'forged', 'responses': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GameSession.objects.exists())
+
+
+@override_settings(GAME_DECKS_ENABLED=True)
+class QuestionDeckTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        self.client = APIClient()
+        for i in range(6):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_serves_pre_generated_decks_then_falls_back(self):
+        snapshot = get_snapshot()
+        self.assertEqual(generate_decks(snapshot, 'he', 3, 2), 2)
+        self.assertEqual(pool_size(snapshot.version, 'he', 3), 2)
+
+        for _ in range(2):
+            response = self.client.get(reverse('game-vocabulary'), {'N': 3})
+            self.assertEqual(len(response.json()['questions']), 3)
+        self.assertEqual(pool_size(snapshot.version, 'he', 3), 0)
 
-    def test_quiz_question_language_is_valid(self):
-        response = self.client.get(reverse('quiz-question'))
+        # Empty pool: questions are generated live
+        response = self.client.get(reverse('game-vocabulary'), {'N': 3})
+        self.assertEqual(len(response.json()['questions']), 3)
+
+    def test_vocabulary_change_discards_decks(self):
+        snapshot = get_snapshot()
+        generate_decks(snapshot, 'he', 3, 2)
+        bump_vocabulary_version()
+        self.assertIsNone(pop_deck(get_vocabulary_version(), 'he', 3))
+
+
+class AsyncGameApiTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        for i in range(6):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    async def test_get_questions_and_submit(self):
+        client = AsyncClient()
+        response = await client.get(reverse('game-vocabulary-async'), {'N': 3, 'LANG': 'ar'})
         self.assertEqual(response.status_code, 200)
         data = response.json()
+        self.assertEqual(len(data['questions']), 3)
+
+        answer = {'concept': 'c1', 'selected_text': 'ע1', 'is_correct': True, 'response_time_ms': 700}
+        response = await client.post(
+            reverse('submit-game-async'),
+            {'session_id': data['session_id'], 'responses': [answer, answer]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await GameResponse.objects.filter(session__session_id=data['session_id']).acount(), 2)
+
+    async def test_errors_match_the_sync_views(self):
+        for params in ({'N': 'x'}, {'N': 0}, {'LANG': 'en'}, {'N': 7}):
+            sync = await self.async_client.get(reverse('game-vocabulary'), params)
+            native = await self.async_client.get(reverse('game-vocabulary-async'), params)
+            self.assertEqual((native.status_code, native.json()), (sync.status_code, sync.json()))
+        for payload in ({}, {'session_id': 'missing', 'responses': []}, {'session_id': 's', 'responses': [{}]}):
+            sync = await self.async_client.post(reverse('submit-game'), payload, content_type='application/json')
+            native = await self.async_client.post(reverse('submit-game-async'), payload, content_type='application/json')
+            self.assertEqual((native.status_code, native.json()), (sync.status_code, sync.json()))
+
+    async def test_question_count_must_be_in_range(self):
+        response = await AsyncClient().get(reverse('game-vocabulary-async'), {'N': -1})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_invalid_payload_writes_nothing(self):
+        await GameSession.objects.acreate(session_id="s1")
+        response = await AsyncClient().post(
+            reverse('submit-game-async'),
+            {'session_id': 's1', 'responses': [{'concept': 'c1'}]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(await GameResponse.objects.aexists())
+
+
+class AdminCsvExportTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        VocabularyEntry.objects.create(concept="water", arabic_text="ماء", hebrew_text="מים")
+        VocabularyEntry.objects.create(concept="fire", arabic_text="نار", hebrew_text="אש")
+
+    def test_export_streams_filtered_entries(self):
+        response = self.client.get(reverse('admin:core_vocabularyentry_changelist') + 'export-csv/', {'q': 'water'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'concept,hint,arabic_word__text,hebrew_word__text')
+        self.assertEqual(lines[1:], ['water,,ماء,מים'])
+
+    def test_export_requires_admin_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('admin:core_vocabularyentry_changelist') + 'export-csv/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_vocabulary_export_action(self):
+        Vocabulary.objects.create(concept="water", language="en", text="water")
+        response = self.client.post(reverse('admin:core_vocabulary_changelist'), {
+            'action': 'export_as_csv',
+            '_selected_action': list(Vocabulary.objects.values_list('pk', flat=True)),
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['concept,language,text,hint,is_correct', 'water,en,water,,False'])
+
+    def test_game_response_export_action(self):
+        session = GameSession.objects.create(session_id="s1")
+        response = GameResponse.objects.create(session=session, concept='water', selected_text='מים',
+                                               is_correct=True, response_time_ms=800)
+        changelist = reverse('admin:core_gameresponse_changelist')
+        self.assertContains(self.client.get(changelist), '800ms')
+
+        export = self.client.post(changelist, {'action': 'export_as_csv', '_selected_action': [response.pk]})
+        lines = b''.join(export.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'session_id,concept,selected_text,is_correct,response_time_ms,submitted_at')
+        self.assertTrue(lines[1].startswith('s1,water,מים,True,800,'))
+        self.assertEqual(len(lines), 2)
+
+
+class VocabularyImportTest(TestCase):
+    def _import(self, text, chunk_size=2):
+        return VocabularyImporter(chunk_size=chunk_size).run(io.StringIO(text))
+
+    def test_imports_all_languages_and_reports_bad_rows(self):
+        result = self._import(
+            "concept,hint,arabic_word__text,hebrew_word__text\n"
+            "water,drink,ماء,מים\n"
+            "fire,,نار,אשש\n"
+            "sun,,شمس,שמש\n"
+            "bad,,ماءء,מים\n"
+        )
+        self.assertEqual((result.created, result.updated), (9, 0))
+        self.assertEqual([(row, concept) for row, concept, _ in result.errors], [(5, 'bad')])
+
+        self.assertEqual(Vocabulary.objects.filter(concept='water', is_correct=True).count(), 2)
+        self.assertEqual(Vocabulary.objects.get(concept='water', language='en').text, 'water')
+        entry = VocabularyEntry.objects.get(concept='water')
+        self.assertEqual((entry.arabic_text, entry.hebrew_text, entry.hint), ('ماء', 'מים', 'drink'))
+        self.assertFalse(Vocabulary.objects.filter(concept='bad').exists())
+
+    def test_reimport_updates_in_place(self):
+        header = "concept,hint,arabic_word__text,hebrew_word__text\n"
+        self._import(header + "water,,ماء,מים\n")
+        result = self._import(header + "water,new hint,مياه,מיים\n")
+        self.assertEqual((result.created, result.updated), (0, 3))
+        self.assertEqual(VocabularyEntry.objects.get(concept='water').hebrew_text, 'מיים')
+        self.assertEqual(Vocabulary.objects.count(), 3)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        header = "concept,hint,arabic_word__text,hebrew_word__text\n"
+        # Savepoint, existing-row count, one upsert per table, the catalog log insert, release
+        with self.assertNumQueries(6):
+            self._import(header + "".join(f"c{i},,ع{i},ע{i}\n" for i in range(50)), chunk_size=500)
+
+
+class VocabularyEntrySyncTest(TestCase):
+    def _add(self, concept, arabic, hebrew):
+        Vocabulary.objects.create(concept=concept, language='ar', text=arabic, is_correct=True)
+        Vocabulary.objects.create(concept=concept, language='he', text=hebrew, is_correct=True)
+
+    def test_syncs_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self._add("water", "ماء", "מים")
+                self._add("fire", "نار", "אשש")
+        self.assertEqual(
+            sorted(VocabularyEntry.objects.values_list('concept', 'hebrew_text')),
+            [('fire', 'אשש'), ('water', 'מים')]
+        )
+
+    def test_reconcile_is_one_query_per_chunk(self):
+        with deferred_entry_sync():
+            for i in range(20):
+                self._add(f"c{i}", f"ع{i}", f"ע{i}")
+        # One pairing SELECT, one upsert and the catalog log insert
+        with self.assertNumQueries(3):
+            reconcile_concepts([f"c{i}" for i in range(20)])
+        self.assertEqual(VocabularyEntry.objects.count(), 20)
+
+    def test_deferred_sync_reconciles_at_the_end(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with deferred_entry_sync():
+                self._add("water", "ماء", "מים")
+                self._add("sun", "شمس", "שמש")
+                self.assertFalse(VocabularyEntry.objects.exists())
+        self.assertEqual(VocabularyEntry.objects.count(), 2)
+
+
+class SyncVocabularyCommandTest(TestCase):
+    def setUp(self):
+        with deferred_entry_sync():
+            for concept, arabic, hebrew in [("water", "ماء", "מים"), ("sun", "شمس", "שמש")]:
+                Vocabulary.objects.create(concept=concept, language='ar', text=arabic, is_correct=True)
+                Vocabulary.objects.create(concept=concept, language='he', text=hebrew, is_correct=True)
+            Vocabulary.objects.create(concept="fire", language='ar', text="نار", is_correct=True)
+            # Suspended sync is reconciled on commit, which never happens inside TestCase
+        VocabularyEntry.objects.create(concept="sun", arabic_text="شمس", hebrew_text="שמש")
+
+    def _call(self, *args):
+        out = io.StringIO()
+        call_command('sync_vocabulary', *args, stdout=out)
+        return out.getvalue()
+
+    def test_writes_only_changed_rows(self):
+        output = self._call()
+        self.assertIn("Created: 1, Updated: 0, Unchanged: 1, Skipped: 1", output)
+        self.assertIn("[pair]", output)
+        self.assertEqual(VocabularyEntry.objects.get(concept="water").hebrew_text, "מים")
+
+        self.assertIn("Created: 0, Updated: 0, Unchanged: 2", self._call())
+
+    def test_dry_run_and_since(self):
+        self.assertIn("1 to create, 0 to update", self._call('--dry-run'))
+        self.assertFalse(VocabularyEntry.objects.filter(concept="water").exists())
+
+        Vocabulary.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        output = self._call('--since', (timezone.now() - timedelta(days=1)).isoformat())
+        self.assertIn("[pair] 0 concepts", output)
+        self.assertFalse(VocabularyEntry.objects.filter(concept="water").exists())
+
+    def test_since_rejects_impossible_dates(self):
+        for value in ['2024-02-30', '2024-02-30T10:00', 'yesterday']:
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                self._call('--since', value)
+
+
+class LengthRuleValidationTest(TestCase):
+    def setUp(self):
+        rows = [
+            ("water", "ar", "ماء"), ("water", "he", "מים"),
+            ("fire", "ar", "نار"), ("fire", "he", "אשש"),
+        ]
+        for concept, language, text in rows:
+            Vocabulary.objects.create(concept=concept, language=language, text=text, is_correct=True)
+        # Bypass Vocabulary.save() validation to store bad data
+        Vocabulary.objects.bulk_create([
+            Vocabulary(concept="sun", language="ar", text="شمس", is_correct=True),
+            Vocabulary(concept="sun", language="he", text="שמשש", is_correct=True),
+            Vocabulary(concept="moon", language="he", text="ירח", is_correct=True),
+        ])
+
+    def test_whole_table_in_one_query(self):
+        with self.assertNumQueries(1):
+            violations = validate_length_rule()
+        self.assertEqual(
+            [(v.concept, v.arabic_length, v.hebrew_length) for v in violations],
+            [("moon", None, 3), ("sun", 3, 4)]
+        )
+
+    def test_queryset_and_in_memory_batch(self):
+        violations = validate_length_rule(Vocabulary.objects.filter(concept__in=["sun", "water"]))
+        self.assertEqual([v.concept for v in violations], ["sun"])
+
+        batch = [
+            Vocabulary(concept="water", language="he", text="מיםם", is_correct=True),
+            Vocabulary(concept="sun", language="ar", text="شمسس", is_correct=True),
+            Vocabulary(concept="sun", language="he", text="שמשש", is_correct=True),
+        ]
+        with self.assertNumQueries(1):
+            violations = validate_length_rule(batch)
+        self.assertEqual([v.concept for v in violations], ["water"])
+
+    def test_command_fails_on_violations(self):
+        with self.assertRaises(CommandError):
+            call_command('validate_vocabulary', stdout=io.StringIO())
+
+
+class SessionCountersTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.session = GameSession.objects.create(session_id="s1")
+
+    def _submit(self, *answers):
+        responses = [
+            {'concept': 'water', 'selected_text': 'מים', 'is_correct': correct, 'response_time_ms': ms}
+            for correct, ms in answers
+        ]
+        return self.client.post(reverse('submit-game'), {'session_id': 's1', 'responses': responses}, format='json')
 
-        self.assertIn(data['question_language'], ['ar', 'he'])
+    def test_submit_updates_counters(self):
+        self._submit((True, 900), (False, 1500))
+        self._submit((True, 400))
+        self.session.refresh_from_db()
+        self.assertEqual(
+            (self.session.response_count, self.session.correct_count, self.session.total_response_time_ms,
+             self.session.min_response_time_ms, self.session.max_response_time_ms),
+            (3, 2, 2800, 400, 1500)
+        )
+        self.assertIsNotNone(self.session.last_activity_at)
 
-    def test_quiz_includes_gif_if_present(self):
-        entry = VocabularyEntry.objects.create(arabic_text="كلمة6", gif="gifs/example.gif")
-        Word.objects.create(text="hebrew6", language="he", entry=entry)
-        Word.objects.create(text="arabic6", language="ar", entry=entry)
+    def test_repair_command_recomputes_counters(self):
+        self._submit((True, 900), (False, 1500))
+        GameSession.objects.update(response_count=99, correct_count=0, min_response_time_ms=None)
+        empty = GameSession.objects.create(session_id="s2", response_count=5)
 
-        response = self.client.get(reverse('quiz-question'))
+        call_command('repair_session_counters', stdout=io.StringIO())
+        self.session.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((self.session.response_count, self.session.correct_count), (2, 1))
+        self.assertEqual(self.session.min_response_time_ms, 900)
+        self.assertEqual(empty.response_count, 0)
+
+    def test_migration_backfills_counters(self):
+        backfill = import_module('core.migrations.0004_gamesession_counters').backfill_counters
+        self._submit((True, 900), (False, 1500))
+        GameSession.objects.update(response_count=0, correct_count=0, total_response_time_ms=0,
+                                   min_response_time_ms=None, max_response_time_ms=None, last_activity_at=None)
+        empty = GameSession.objects.create(session_id="s2")
+
+        with self.assertNumQueries(1):
+            backfill(apps, None)
+        self.session.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual(
+            (self.session.response_count, self.session.correct_count, self.session.total_response_time_ms,
+             self.session.min_response_time_ms, self.session.max_response_time_ms),
+            (2, 1, 2400, 900, 1500)
+        )
+        self.assertIsNotNone(self.session.last_activity_at)
+        self.assertEqual((empty.response_count, empty.min_response_time_ms), (0, None))
+
+
+class ConceptRollupTest(TestCase):
+    def setUp(self):
+        self.session = GameSession.objects.create(session_id="s1", language_preference='ar')
+
+    def _respond(self, concept, correct, ms):
+        return GameResponse(session=self.session, concept=concept, selected_text='x',
+                            is_correct=correct, response_time_ms=ms)
+
+    def test_incremental_rollup_and_stats_endpoint(self):
+        GameResponse.objects.bulk_create([
+            self._respond('water', True, 400), self._respond('water', False, 1200), self._respond('sun', True, 700),
+        ])
+        self.assertEqual(roll_up_responses(chunk_size=2), 3)
+        GameResponse.objects.bulk_create([self._respond('water', True, 800)])
+        # Only the new response is read on the next run
+        self.assertEqual(roll_up_responses(), 1)
+        self.assertEqual(roll_up_responses(), 0)
+
+        stats = ConceptDailyStats.objects.get(concept='water')
+        self.assertEqual((stats.language, stats.response_count, stats.correct_count), ('ar', 3, 2))
+        self.assertEqual(stats.total_response_time_ms, 2400)
+
+        response = self.client.get(reverse('concept-stats'), {'LANG': 'ar', 'concept': 'water'})
+        [water] = response.json()['results']
+        self.assertEqual(water['responses'], 3)
+        self.assertEqual(water['correct_ratio'], 0.6667)
+        self.assertEqual(water['mean_response_time_ms'], 800)
+        self.assertTrue(750 <= water['p50_response_time_ms'] <= 1000)
+
+    def test_backfill_command_rebuilds_from_scratch(self):
+        GameResponse.objects.bulk_create([self._respond('water', True, 400) for _ in range(5)])
+        roll_up_responses()
+        call_command('rollup_responses', '--reset', '--chunk-size', '2', stdout=io.StringIO())
+        self.assertEqual(ConceptDailyStats.objects.get().response_count, 5)
+
+    def test_stats_reject_bad_dates(self):
+        for since in ('yesterday', '2024-02-30'):
+            response = self.client.get(reverse('concept-stats'), {'since': since})
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(GAME_SELECTION_MODE='adaptive')
+class AdaptiveSelectionTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        self.client = APIClient()
+        for i in range(20):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_missed_and_slow_concepts_come_back(self):
+        session_id = self.client.get(reverse('game-vocabulary'), {'N': 3}).json()['session_id']
+        answers = [
+            {'concept': 'c1', 'selected_text': 'x', 'is_correct': False, 'response_time_ms': 900},
+            {'concept': 'c2', 'selected_text': 'ע2', 'is_correct': True, 'response_time_ms': 9000},
+            {'concept': 'c3', 'selected_text': 'ע3', 'is_correct': True, 'response_time_ms': 500},
+        ]
+        self.client.post(reverse('submit-game'), {'session_id': session_id, 'responses': answers}, format='json')
+        self.assertEqual(get_mastery(session_id), {'c1': 0, 'c2': 1, 'c3': 2})
+
+        for _ in range(5):
+            response = self.client.get(reverse('game-vocabulary'), {'N': 5, 'session_id': session_id})
+            concepts = {q['concept'] for q in response.json()['questions']}
+            self.assertEqual(len(concepts), 5)
+            # 60% of 5 rounds to 3 review slots, enough for every concept on record
+            self.assertTrue({'c1', 'c2', 'c3'} <= concepts)
+
+    def test_mastery_state_stays_bounded(self):
+        mastery = {}
+        with self.settings(GAME_ADAPTIVE_MAX_CONCEPTS=3):
+            apply_answers(mastery, [
+                {'concept': f"c{i}", 'is_correct': i % 2 == 0, 'response_time_ms': 500} for i in range(6)
+            ])
+        self.assertEqual(mastery, {'c1': 0, 'c3': 0, 'c5': 0})
+
+
+class ResponseArchiveTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        session = GameSession.objects.create(session_id="s1", language_preference='ar')
+        GameResponse.objects.bulk_create([
+            GameResponse(session=session, concept=f"c{i}", selected_text='ماء', is_correct=i % 2 == 0,
+                         response_time_ms=500 + i)
+            for i in range(5)
+        ])
+        ids = list(GameResponse.objects.order_by('id').values_list('id', flat=True))
+        GameResponse.objects.filter(id__in=ids[:2]).update(submitted_at=datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        GameResponse.objects.filter(id=ids[2]).update(submitted_at=datetime(2024, 2, 3, tzinfo=dt_timezone.utc))
+        self.cutoff = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+
+    def _archive_and_reload(self, fmt):
+        roll_up_responses()
+        result = archive_responses(self.cutoff, self.directory, fmt=fmt, chunk_size=2)
+        self.assertEqual((result.archived, result.deleted), (3, 3))
+        self.assertEqual([os.path.basename(path) for path in result.files],
+                         [f'responses-2024-01.{fmt}.gz', f'responses-2024-02.{fmt}.gz'])
+        self.assertEqual(GameResponse.objects.count(), 2)
+
+        GameSession.objects.filter(session_id="s1").delete()
+        call_command('load_response_archive', '2024-01', '--directory', self.directory, stdout=io.StringIO())
+        # Loading the same partition again adds nothing
+        self.assertEqual(load_archive(result.files[0]), 2)
+        restored = GameResponse.objects.order_by('id')
+        self.assertEqual([r.concept for r in restored], ['c0', 'c1'])
+        self.assertEqual(restored[0].submitted_at, datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        self.assertEqual(restored[0].session.language_preference, 'ar')
+        self.assertEqual(restored[0].session.response_count, 2)
+        self.assertEqual(restored[0].selected_text, 'ماء')
+        self.assertFalse(restored[1].is_correct)
+
+    def test_archive_and_reload_ndjson(self):
+        self._archive_and_reload('ndjson')
+
+    def test_archive_and_reload_csv(self):
+        self._archive_and_reload('csv')
+
+    def test_rows_not_rolled_up_are_kept(self):
+        first_id = GameResponse.objects.order_by('id').values_list('id', flat=True)[0]
+        RollupCheckpoint.objects.create(name='concept_daily_stats', last_id=first_id)
+        result = archive_responses(self.cutoff, self.directory)
+        self.assertEqual(result.archived, 1)
+        self.assertEqual(GameResponse.objects.count(), 4)
+
+    def test_nothing_is_archived_before_the_first_rollup(self):
+        result = archive_responses(self.cutoff, self.directory)
+        self.assertEqual((result.archived, result.files), (0, []))
+        self.assertEqual(GameResponse.objects.count(), 5)
+
+        result = archive_responses(self.cutoff, self.directory, ignore_rollups=True)
+        self.assertEqual(result.archived, 3)
+
+    def test_archived_sessions_survive_repair_and_purge(self):
+        call_command('repair_session_counters', stdout=io.StringIO())
+        roll_up_responses()
+        GameResponse.objects.update(submitted_at=datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        result = archive_responses(self.cutoff, self.directory)
+        session = GameSession.objects.get(session_id="s1")
+        self.assertEqual((session.archived_response_count, session.archived_correct_count), (5, 3))
+
+        call_command('repair_session_counters', stdout=io.StringIO())
+        session.refresh_from_db()
+        self.assertEqual((session.response_count, session.correct_count, session.total_response_time_ms),
+                         (5, 3, 2510))
+        self.assertEqual((session.min_response_time_ms, session.max_response_time_ms), (500, 504))
+        GameSession.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge_abandoned_sessions(timezone.now(), pause=0).deleted, 0)
+
+        # Reloaded answers are counted by their rows again, not twice
+        load_archive(result.files[0])
+        call_command('repair_session_counters', stdout=io.StringIO())
+        session.refresh_from_db()
+        self.assertEqual((session.response_count, session.archived_response_count), (5, 0))
+
+    def test_command_rejects_impossible_dates(self):
+        with self.assertRaisesMessage(CommandError, '--before must be a date'):
+            call_command('archive_responses', '--before', '2024-02-30', '--directory', self.directory,
+                         stdout=io.StringIO())
+
+
+class SessionPurgeTest(TestCase):
+    def test_purges_only_old_sessions_without_responses(self):
+        GameSession.objects.bulk_create([GameSession(session_id=f"old{i}") for i in range(7)])
+        answered = GameSession.objects.create(session_id="answered")
+        save_responses([GameResponse(session=answered, concept='c1', selected_text='x',
+                                     is_correct=True, response_time_ms=500)])
+        GameSession.objects.update(created_at=timezone.now() - timedelta(days=2))
+        GameSession.objects.create(session_id="fresh")
+
+        result = purge_abandoned_sessions(timezone.now() - timedelta(days=1), batch_size=3, pause=0)
+        self.assertEqual((result.deleted, result.batches), (7, 3))
+        self.assertEqual(set(GameSession.objects.values_list('session_id', flat=True)), {'answered', 'fresh'})
+
+    def test_command_reports_throughput(self):
+        GameSession.objects.create(session_id="s1")
+        GameSession.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        out = io.StringIO()
+        call_command('purge_sessions', '--ttl-hours', '1', '--pause', '0', stdout=out)
+        self.assertIn('Purged 1 sessions in 1 batches', out.getvalue())
+        self.assertFalse(GameSession.objects.exists())
+
+
+class GameResponseListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        session = GameSession.objects.create(session_id="s1")
+        other = GameSession.objects.create(session_id="s2")
+        save_responses([
+            GameResponse(session=session, concept=f"c{i}", selected_text='x', is_correct=True, response_time_ms=500)
+            for i in range(5)
+        ] + [GameResponse(session=other, concept='c9', selected_text='x', is_correct=False, response_time_ms=900)])
+        # Ties on submitted_at are broken by id
+        GameResponse.objects.filter(concept__in=['c1', 'c2']).update(
+            submitted_at=GameResponse.objects.get(concept='c1').submitted_at
+        )
+
+    def _pages(self, params):
+        concepts = []
+        url = reverse('game-responses')
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            concepts += [row['concept'] for row in data['results']]
+            url, params = data['next'], None
+        return concepts
+
+    def test_pages_through_a_session(self):
+        self.assertEqual(self._pages({'session_id': 's1', 'limit': 2}), ['c0', 'c1', 'c2', 'c3', 'c4'])
+
+    def test_pages_through_a_time_window(self):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        self.assertEqual(self.client.get(reverse('game-responses'), {'since': since}).status_code, 403)
+        self.client.force_authenticate(User.objects.create_user('analytics', is_staff=True))
+        self.assertEqual(self._pages({'since': since, 'limit': 4}), ['c0', 'c1', 'c2', 'c3', 'c4', 'c9'])
+
+    def test_time_windows_use_an_index(self):
+        window = GameResponse.objects.filter(submitted_at__gte=timezone.now()).order_by('submitted_at', 'id')
+        plan = window.explain()
+        self.assertIn('INDEX', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_unchanged_page_is_not_modified(self):
+        params = {'session_id': 's1', 'limit': 2}
+        response = self.client.get(reverse('game-responses'), params)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('game-responses'), params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        GameResponse.objects.filter(concept='c0').delete()
+        response = self.client.get(reverse('game-responses'), params, HTTP_IF_NONE_MATCH=etag)
         self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_rejects_bad_requests(self):
+        url = reverse('game-responses')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'session_id': 's1', 'cursor': 'forged'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'session_id': 's1', 'limit': 10000}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'session_id': 's1', 'since': '2024-02-30T10:00:00'}).status_code, 400)
 
-        # GIF is optional, so we just verify field exists
-        self.assertIn('gif', response.json())
 
-class PlayerScoreAPITest(TestCase):
+class CatalogTest(TestCase):
     def setUp(self):
+        game_cache.clear()
         self.client = APIClient()
-        self.player_create_url = reverse('player-create')  # URL name for creating player
-        self.score_create_url = reverse('score-create')    # URL name for creating score
-
-    def test_create_player(self):
-        data = {"name": "Alice"}
-        response = self.client.post(self.player_create_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Player.objects.count(), 1)
-        self.assertEqual(Player.objects.get().name, "Alice")
-
-    def test_add_score_for_player_success(self):
-        player = Player.objects.create(name="Alice")
-        data = {"player": player.id, "score": 42}  # Ensure this matches your serializer field
-        response = self.client.post(self.score_create_url, data, format='json')
-        print(response.data)  # Debug output
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-
-    def test_add_score_for_nonexistent_player(self):
-        data = {"player": 9999, "score": 100}  # Non-existent player ID
-        response = self.client.post(self.score_create_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for i in range(3):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_full_catalog_and_delta(self):
+        response = self.client.get(reverse('game-catalog'))
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual([e['concept'] for e in data['entries']], ['c0', 'c1', 'c2'])
+        version = data['version']
+        self.assertEqual(response['ETag'], f'"catalog-{version}"')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('game-catalog'), HTTP_IF_NONE_MATCH=f'"catalog-{version}"')
+        self.assertEqual(response.status_code, 304)
+
+        removed_id = VocabularyEntry.objects.get(concept='c0').id
+        VocabularyEntry.objects.filter(id=removed_id).delete()
+        VocabularyEntry.objects.filter(concept='c1').update(hint='changed')  # no signal, not in the delta
+        entry = VocabularyEntry.objects.get(concept='c2')
+        entry.hint = 'new hint'
+        entry.save()
+        # Written by the bulk sync path, which logs its own changes
+        Vocabulary.objects.bulk_create([
+            Vocabulary(concept='c3', language='ar', text='ع3', is_correct=True),
+            Vocabulary(concept='c3', language='he', text='ע3', is_correct=True),
+        ])
+        reconcile_concepts(['c3'])
+
+        data = self.client.get(reverse('game-catalog'), {'since': version}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual(data['version'], catalog_version())
+        self.assertEqual(data['deletes'], [removed_id])
+        self.assertEqual([(e['concept'], e['hint']) for e in data['upserts']], [('c2', 'new hint'), ('c3', '')])
+
+        # Nothing changed since the latest version
+        data = self.client.get(reverse('game-catalog'), {'since': data['version']}).json()
+        self.assertEqual((data['upserts'], data['deletes']), ([], []))
+
+    def test_delta_falls_back_to_full_catalog(self):
+        with self.settings(GAME_CATALOG_DELTA_MAX=1):
+            self.assertTrue(self.client.get(reverse('game-catalog'), {'since': 0}).json()['full'])
+        # Unknown future versions restart the client with a full download
+        self.assertTrue(self.client.get(reverse('game-catalog'), {'since': 10 ** 6}).json()['full'])
+        self.assertEqual(self.client.get(reverse('game-catalog'), {'since': 'x'}).status_code, 400)
+
+
+@override_settings(DATABASE_READ_ALIAS='replica')
+class ReadReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        for i in range(3):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        # Not copied yet: read-only paths see the empty replica, everything else the primary
+        with read_replica():
+            self.assertEqual(VocabularyEntry.objects.count(), 0)
+        self.assertEqual(VocabularyEntry.objects.count(), 3)
+        self.assertEqual(self.client.get(reverse('game-vocabulary'), {'N': 3}).status_code, 400)
+
+        call_command('refresh_replica', stdout=io.StringIO())
+        response = self.client.get(reverse('game-vocabulary'), {'N': 3})
+        self.assertEqual(response.status_code, 200)
+        # The session is written to (and read back from) the primary
+        session_id = response.json()['session_id']
+        self.assertTrue(GameSession.objects.filter(session_id=session_id).exists())
+        with read_replica():
+            self.assertFalse(GameSession.objects.filter(session_id=session_id).exists())
+            # Writes inside a read-only block still go to the primary
+            VocabularyEntry.objects.create(concept="c9", arabic_text="ع9", hebrew_text="ע9")
+        self.assertTrue(VocabularyEntry.objects.filter(concept="c9").exists())
+
+    def test_connections_are_tuned(self):
+        pragmas = sqlite_pragmas()
+        self.assertEqual(pragmas['busy_timeout'], 20000)
+        self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+
+
+class TwoTierCacheTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        self.cache = TwoTierCache(max_entries=2)
+
+    def test_local_tier_is_bounded_and_backed_by_shared_tier(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key.upper())
+        self.assertEqual(len(self.cache.local), 2)
+        self.assertEqual(self.cache.get('a'), 'A')  # evicted locally, read back from the shared tier
+        self.assertEqual(self.cache.get('a'), 'A')
+        self.assertIsNone(self.cache.get('missing'))
+        stats = self.cache.stats()
+        self.assertEqual((stats['shared_hits'], stats['local_hits'], stats['misses']), (1, 1, 1))
+
+    def test_bump_invalidates_namespace(self):
+        key = self.cache.key('vocabulary', 'catalog')
+        self.cache.set(key, 'old')
+        other_process = TwoTierCache()
+        self.assertEqual(other_process.key('vocabulary', 'catalog'), key)
+
+        self.cache.bump('vocabulary')
+        self.assertNotEqual(self.cache.key('vocabulary', 'catalog'), key)
+        # Other processes notice once their local copy of the version expires
+        other_process.local.clear()
+        self.assertEqual(other_process.key('vocabulary', 'catalog'), self.cache.key('vocabulary', 'catalog'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_set('slow', compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()['waits'], 4)
+
+    def test_suite_does_not_touch_the_configured_cache_or_metrics(self):
+        # core.testing.IsolatedTestRunner swaps in a temporary directory
+        self.assertIn('simsim-tests-', settings.CACHES['default']['LOCATION'])
+        self.assertIn('simsim-tests-', settings.METRICS_DIR)
+
+    def test_file_cache_increments_are_atomic(self):
+        # Through django.core.cache.cache, as callers use it: each thread gets its own FileBasedCache
+        self.assertIsInstance(caches['default'], FileBasedCache)
+        cache.set('core:test:counter', 0)
+        self.addCleanup(cache.delete, 'core:test:counter')
+
+        def bump():
+            for _ in range(25):
+                atomic_incr('core:test:counter', backend=cache)
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('core:test:counter'), 200)
+        self.assertFalse(atomic_add('core:test:counter', 1, backend=cache))
+
+    def test_rollup_run_refreshes_cached_stats(self):
+        session = GameSession.objects.create(session_id="s1", language_preference='ar')
+        respond = lambda: GameResponse(session=session, concept='water', selected_text='x',
+                                       is_correct=True, response_time_ms=400)
+        GameResponse.objects.bulk_create([respond()])
+        roll_up_responses()
+        self.assertEqual(self.client.get(reverse('concept-stats')).json()['results'][0]['responses'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('concept-stats'))
+
+        GameResponse.objects.bulk_create([respond()])
+        roll_up_responses()
+        self.assertEqual(self.client.get(reverse('concept-stats')).json()['results'][0]['responses'], 2)
+
+
+class GameBenchmarkTest(TransactionTestCase):
+    def setUp(self):
+        game_cache.clear()
+
+    def test_run_load_reports_each_endpoint(self):
+        seed_entries(20)
+        results, errors = run_load(clients=1, rounds=3, questions=2, warmup=1)
+        self.assertEqual(errors, [])
+        self.assertEqual(set(results), {'vocabulary', 'submit'})
+        self.assertEqual(results['vocabulary']['requests'], 3)
+        self.assertEqual(results['submit']['errors'], 0)
+        self.assertLessEqual(results['submit']['p50_ms'], results['submit']['p99_ms'])
+        self.assertEqual(GameResponse.objects.count(), 8)
+
+    def test_percentile_and_baseline_comparison(self):
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertIsNone(percentile([], 50))
+        baseline = {'100_entries': {'submit': {'p95_ms': 10, 'throughput_rps': 100, 'queries_per_request': 4}}}
+        steady = {'100_entries': {'submit': {'p95_ms': 11, 'throughput_rps': 90, 'queries_per_request': 4}}}
+        slower = {'100_entries': {'submit': {'p95_ms': 20, 'throughput_rps': 50, 'queries_per_request': 6}}}
+        self.assertEqual(compare(steady, baseline, 0.25), [])
+        self.assertEqual(len(compare(slower, baseline, 0.25)), 3)
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SAMPLE_RATE=1.0)
+class QueryProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        game_cache.clear()
+        clear_snapshot()
+        for i in range(6):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_reports_queries_and_timings(self):
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = self.client.get(reverse('game-vocabulary'), {'N': 3})
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('view;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('game-vocabulary'))
+        self.assertGreater(record['queries'], 0)
+        self.assertEqual(record['response_bytes'], len(response.content))
+
+    async def test_counts_queries_of_async_views(self):
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            await AsyncClient().get(reverse('game-vocabulary-async'), {'N': 3})
+        self.assertGreater(json.loads(logs.records[0].getMessage())['queries'], 0)
+
+    def test_leaves_callers_query_wrappers_alone(self):
+        def caller_wrapper(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        # As on a connection opened before profiling was switched on
+        if _record_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(_record_query)
+        for _ in range(3):
+            with self.assertLogs('core.profiling', 'INFO'), connection.execute_wrapper(caller_wrapper):
+                self.client.get(reverse('game-vocabulary'), {'N': 3})
+        self.assertNotIn(caller_wrapper, connection.execute_wrappers)
+        self.assertEqual(connection.execute_wrappers.count(_record_query), 1)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get(reverse('game-vocabulary'), {'N': 3})
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_off_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('game-vocabulary'), {'N': 3}))
+
+    def test_flags_repeated_queries(self):
+        profile = RequestProfile()
+        for params in ([1], [1], [2], [3, 4]):
+            profile.add('SELECT * FROM t WHERE id IN (%s)' if len(params) == 1 else
+                        'SELECT * FROM t WHERE id IN (%s, %s)', params, 0.001)
+        profile.add('SELECT 1', [], 0.001)
+        self.assertEqual(profile.duplicates(similar_threshold=3), [
+            {'sql': 'SELECT * FROM t WHERE id IN (%s)', 'count': 2, 'exact': True},
+        ])
+        profile.add('SELECT 2 WHERE x = %s', [1], 0.001)
+        profile.add('SELECT 2 WHERE x = %s', [2], 0.001)
+        profile.add('SELECT 2 WHERE x = %s', [3], 0.001)
+        self.assertIn({'sql': 'SELECT 2 WHERE x = %s', 'count': 3, 'exact': False}, profile.duplicates(3))
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(METRICS_ENABLED=True, METRICS_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        registry.reset()
+        self.addCleanup(registry.reset)
+        game_cache.clear()
+        clear_snapshot()
+        for i in range(6):
+            VocabularyEntry.objects.create(concept=f"c{i}", arabic_text=f"ع{i}", hebrew_text=f"ע{i}")
+
+    def test_game_traffic_is_exposed(self):
+        data = self.client.get(reverse('game-vocabulary'), {'N': 3, 'LANG': 'ar'}).json()
+        answer = {'concept': 'c1', 'selected_text': 'ע1', 'is_correct': True, 'response_time_ms': 700}
+        self.client.post(reverse('submit-game'), {'session_id': data['session_id'], 'responses': [answer, answer]},
+                         content_type='application/json')
+        game_cache.get('missing')
+        game_cache.set('present', 1)
+        game_cache.get('present')
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('http_requests_total{route="api/api/game/vocabulary/",method="GET",status="200"} 1\n', text)
+        self.assertIn('http_request_duration_seconds_count{route="api/api/game/submit/",method="POST"} 1\n', text)
+        self.assertIn('http_request_duration_seconds_bucket{route="api/api/game/submit/",method="POST",le="+Inf"} 1\n', text)
+        self.assertIn('game_questions_served_total{source="sampled",lang="ar"} 3\n', text)
+        self.assertIn('game_responses_ingested_total 2\n', text)
+        self.assertIn('game_snapshot_reload_seconds_count 1\n', text)
+        self.assertIn('game_cache_hit_ratio 0.5\n', text)
+
+    def test_processes_are_summed(self):
+        responses_ingested.inc(2)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                responses_ingested.inc(5)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertIn('game_responses_ingested_total 7\n', registry.render())
+
+    def test_file_grows_and_reopens(self):
+        path = os.path.join(self.directory, 'grow.db')
+        store = MmapFile(path)
+        for i in range(3000):
+            store.add(f'key-{i}', i)
+        store.add('key-1', 1)
+        store.close()
+        self.assertEqual(MmapFile(path)._positions.keys(), read_file(path).keys())
+        self.assertEqual(read_file(path)['key-1'], 2)
+        self.assertEqual(len(read_file(path)), 3000)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
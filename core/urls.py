@@ -1,7 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from . import async_views
+
+# GAME_API_ASYNC serves the main game routes with the async-native views
+if getattr(settings, 'GAME_API_ASYNC', False):
+    game_vocabulary_view = async_views.AsyncGameVocabularyView.as_view()
+    submit_game_view = async_views.AsyncSubmitGameView.as_view()
+else:
+    game_vocabulary_view = views.GameVocabularyView.as_view()
+    submit_game_view = views.SubmitGameView.as_view()
 
 urlpatterns = [
-    path('api/game/vocabulary/', views.GameVocabularyView.as_view(), name='game-vocabulary'),
-    path('api/game/submit/', views.SubmitGameView.as_view(), name='submit-game'),
-]
\ No newline at end of file
+    path('api/game/vocabulary/', game_vocabulary_view, name='game-vocabulary'),
+    path('api/game/submit/', submit_game_view, name='submit-game'),
+    path('api/game/async/vocabulary/', async_views.AsyncGameVocabularyView.as_view(), name='game-vocabulary-async'),
+    path('api/game/async/submit/', async_views.AsyncSubmitGameView.as_view(), name='submit-game-async'),
+    path('api/game/responses/', views.GameResponseListView.as_view(), name='game-responses'),
+    path('api/game/catalog/', views.CatalogView.as_view(), name='game-catalog'),
+    path('api/stats/concepts/', views.ConceptStatsView.as_view(), name='concept-stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
+]
@@ -0,0 +1,91 @@
+"""
+Batch validation of the Arabic/Hebrew length-match rule
+
+Vocabulary.clean() checks one Hebrew row at a time with its own query for the
+Arabic row. These helpers check any number of rows with a single grouped
+query and return every violation instead of stopping at the first.
+"""
+from collections import namedtuple
+
+from django.db.models import Count, Max, Q, QuerySet
+
+from .models import Vocabulary
+
+CHUNK_SIZE = 500
+
+LengthViolation = namedtuple('LengthViolation', ['concept', 'arabic_length', 'hebrew_length', 'message'])
+
+
+def check_length_rule(concept, arabic_text, hebrew_text):
+    """Return a LengthViolation for one concept, or None if it is valid"""
+    hebrew_length = len(hebrew_text.strip())
+    if arabic_text is None:
+        return LengthViolation(
+            concept, None, hebrew_length,
+            f"Corresponding Arabic entry not found for concept '{concept}'"
+        )
+    arabic_length = len(arabic_text.strip())
+    if arabic_length != hebrew_length:
+        return LengthViolation(
+            concept, arabic_length, hebrew_length,
+            f"Hebrew text length ({hebrew_length}) must match Arabic text length ({arabic_length}) "
+            f"for concept '{concept}'"
+        )
+    return None
+
+
+def _grouped_texts(concepts=None):
+    """concept -> (arabic_text, hebrew_text) for concepts with a correct Hebrew row, in one GROUP BY query"""
+    queryset = Vocabulary.objects.filter(is_correct=True, language__in=['ar', 'he'])
+    if concepts is not None:
+        queryset = queryset.filter(concept__in=concepts)
+    rows = (
+        queryset.order_by()
+        .values('concept')
+        .annotate(
+            arabic_text=Max('text', filter=Q(language='ar')),
+            hebrew_text=Max('text', filter=Q(language='he')),
+            hebrew_rows=Count('id', filter=Q(language='he')),
+        )
+        .filter(hebrew_rows__gt=0)
+        .order_by('concept')
+    )
+    return {row['concept']: (row['arabic_text'], row['hebrew_text']) for row in rows.iterator()}
+
+
+def validate_length_rule(rows=None):
+    """
+    Check the length rule for many Vocabulary rows at once
+
+    `rows` may be None (the whole table), a Vocabulary queryset (its concepts
+    are checked against the stored translations), or an in-memory batch of
+    possibly unsaved Vocabulary instances, which take precedence over what is
+    stored. Returns a list of LengthViolation, one per failing concept.
+    """
+    if rows is None or isinstance(rows, QuerySet):
+        concepts = None if rows is None else rows.values('concept')
+        texts = _grouped_texts(concepts)
+    else:
+        arabic = {}
+        hebrew = {}
+        for row in rows:
+            if row.is_correct and row.language == 'ar':
+                arabic[row.concept] = row.text
+            elif row.is_correct and row.language == 'he':
+                hebrew[row.concept] = row.text
+
+        # Only look up the Arabic rows the batch does not carry itself
+        missing = sorted(set(hebrew) - set(arabic))
+        for start in range(0, len(missing), CHUNK_SIZE):
+            stored = Vocabulary.objects.filter(
+                concept__in=missing[start:start + CHUNK_SIZE], language='ar', is_correct=True
+            ).values_list('concept', 'text')
+            arabic.update(stored)
+        texts = {concept: (arabic.get(concept), text) for concept, text in sorted(hebrew.items())}
+
+    violations = []
+    for concept, (arabic_text, hebrew_text) in texts.items():
+        violation = check_length_rule(concept, arabic_text, hebrew_text)
+        if violation:
+            violations.append(violation)
+    return violations
@@ -1,16 +1,32 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.core.cache import cache
-from .models import VocabularyEntry, GameSession, GameResponse
-import random
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, HttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags
+from .models import GameSession, GameResponse
+from .catalog import catalog_delta, catalog_version, full_catalog
+from .decks import pop_deck
+from .ingest import get_response_buffer, save_responses
+from .game import (
+    GameRequestError, adaptive_questions, adaptive_selection_enabled, database_sample, decks_enabled,
+    distractor_pool_size, generate_session_id, parse_question_request, parse_submission, questions_response,
+    response_rows, sampled_questions, server_busy, signed_session_owner, signed_session_token, signed_sessions,
+    snapshot_enabled, snapshot_sample, write_behind_enabled, write_behind_timeout,
+)
+from .mastery import adaptive_enabled, get_mastery, mastery_session_id, record_answers
+from .metrics import metrics_enabled, registry
+from .pagination import decode_cursor, encode_cursor, page_etag, parse_position, response_position
+from .rollups import cached_concept_stats
+from .routers import read_replica
+from .sampling import sample_entries
+from .session_tokens import read_session_token
+from .snapshot import get_snapshot, get_vocabulary_version
 from rest_framework.views import APIView
 from rest_framework import status
-
-
-def generate_session_id():
-    """Generate a unique session ID using UUID"""
-    import uuid
-    return str(uuid.uuid4())
+from rest_framework.permissions import IsAdminUser
+from .serializers import GameResponseSerializer
 
 
 class GameVocabularyView(APIView):
@@ -20,88 +36,47 @@ class GameVocabularyView(APIView):
 
     def get(self, request):
         try:
-            # Get parameters with defaults
-            lang = request.GET.get('LANG', 'he')  # Default to Hebrew
-            try:
-                n = int(request.GET.get('N', 5))  # Default to 5 questions
-            except ValueError:
-                return Response(
-                    {'error': 'N must be an integer'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Validate language
-            if lang not in ['ar', 'he']:
-                return Response(
-                    {'error': 'Language must be either "ar" (Arabic) or "he" (Hebrew)'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Get random vocabulary entries
-            entries = list(VocabularyEntry.objects.all())
-            if len(entries) < n:
-                return Response(
-                    {'error': f'Not enough vocabulary available (need {n}, have {len(entries)})'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            selected_entries = random.sample(entries, n)
-            questions = self._prepare_questions(selected_entries, lang)
-
-            # Handle session
+            lang, n = parse_question_request(request.GET)
             session_id = request.GET.get('session_id')
-            session = self._get_or_create_session(session_id, lang)
-
-            return Response({
-                'session_id': session.session_id,
-                'questions': questions
-            })
 
+            # In adaptive mode, sessions with answers on record get questions picked for review
+            questions, source = self._adaptive_questions(session_id, lang, n), 'adaptive'
+            # Serve a pre-generated deck when one is available
+            if questions is None and decks_enabled():
+                questions, source = pop_deck(get_vocabulary_version(), lang, n), 'deck'
+            if questions is None:
+                entries, distractors, available = self._sample_entries(n)
+                questions, source = sampled_questions(entries, distractors, available, lang, n), 'sampled'
+
+            if signed_sessions():
+                session_id = signed_session_token(session_id, lang)
+            else:
+                session_id = self._get_or_create_session(session_id, lang).session_id
+            return Response(questions_response(session_id, questions, source, lang))
+
+        except GameRequestError as e:
+            return Response(e.body(), status=e.status, headers=e.headers)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    def _prepare_questions(self, entries, lang):
-        """Prepare question data for the response"""
-        questions = []
-        for entry in entries:
-            # Get question text in the requested language
-            question_text = entry.hebrew_text if lang == 'he' else entry.arabic_text
-
-            # Get correct answer in opposite language
-            correct_answer_text = entry.arabic_text if lang == 'he' else entry.hebrew_text
-
-            # Get all possible answers in opposite language
-            answer_lang = 'he' if lang == 'ar' else 'ar'
-            all_entries = VocabularyEntry.objects.exclude(id=entry.id)
-            other_answers = [
-                e.arabic_text if answer_lang == 'ar' else e.hebrew_text
-                for e in all_entries
-            ]
-
-            # Select 3 incorrect options
-            incorrect = random.sample(other_answers, min(3, len(other_answers)))
-
-            # Combine correct and incorrect answers
-            correct_answer = {
-                'id': f'correct_{entry.id}',
-                'text': correct_answer_text
-            }
-            options = [correct_answer] + [
-                {'id': f'incorrect_{i}', 'text': text} for i, text in enumerate(incorrect)
-            ]
-            random.shuffle(options)
-
-            questions.append({
-                'question': question_text,
-                'options': options,
-                'answer': correct_answer['id'],
-                'concept': entry.concept  # Add concept for response submission
-            })
-
-        return questions
+    def _adaptive_questions(self, session_id, lang, n):
+        """Return questions weighted towards the session's weak concepts, or None"""
+        if not adaptive_selection_enabled():
+            return None
+        mastery = get_mastery(mastery_session_id(session_id))
+        if not mastery:
+            return None
+        return adaptive_questions(get_snapshot(), mastery, lang, n)
+
+    def _sample_entries(self, n):
+        """Return n random entries, a distractor index and the vocabulary size"""
+        if snapshot_enabled():
+            return snapshot_sample(get_snapshot(), n)
+        # Without the snapshot, sample the questions and a pool of distractors from the database
+        return database_sample(sample_entries(n, extra=distractor_pool_size()))
 
     def _get_or_create_session(self, session_id, lang):
         """Get existing session or create a new one"""
@@ -125,23 +100,22 @@ class SubmitGameView(APIView):
     def post(self, request):
         data = request.data
         try:
-            # Validate required fields
-            if 'session_id' not in data:
-                return Response(
-                    {'error': 'session_id is required'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if 'responses' not in data or not isinstance(data['responses'], list):
-                return Response(
-                    {'error': 'responses must be a list'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            session = GameSession.objects.get(session_id=data['session_id'])
-            self._save_responses(session, data['responses'])
+            responses = parse_submission(data)
+            session = self._get_session(data['session_id'])
+            rows = response_rows(session, responses)
+            if write_behind_enabled():
+                if not get_response_buffer().offer(rows, timeout=write_behind_timeout()):
+                    raise server_busy()
+            else:
+                # Responses and session counters are written in one transaction
+                save_responses(rows)
+            if adaptive_enabled():
+                record_answers(session.session_id, responses)
 
             return Response({'status': 'success'})
 
+        except GameRequestError as e:
+            return Response(e.body(), status=e.status, headers=e.headers)
         except GameSession.DoesNotExist:
             return Response(
                 {'error': 'Invalid session ID'},
@@ -158,21 +132,185 @@ class SubmitGameView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    def _save_responses(self, session, responses):
-        """Save all game responses to the database"""
-        for response in responses:
-            # Validate each response has required fields
-            required_fields = ['concept', 'selected_text', 'is_correct', 'response_time_ms']
-            if not all(field in response for field in required_fields):
-                raise KeyError(f"Response missing one of {required_fields}")
-
-            GameResponse.objects.create(
-                session=session,
-                concept=response['concept'],
-                selected_text=response['selected_text'],
-                is_correct=response['is_correct'],
-                response_time_ms=response['response_time_ms']
+    def _get_session(self, session_id):
+        """Look up the submitting session; signed tokens create their row on first submit"""
+        if not signed_sessions():
+            return GameSession.objects.get(session_id=session_id)
+
+        session_id, lang = signed_session_owner(session_id)
+        session, _ = GameSession.objects.get_or_create(
+            session_id=session_id,
+            defaults={'language_preference': lang}
+        )
+        return session
+
+
+class CatalogView(APIView):
+    """
+    API endpoint for the whole vocabulary catalog, versioned for client-side question generation
+
+    Without `since` it returns every entry; with `since=<version>` only the
+    entries written after that version (upserts) and the ids deleted since
+    (deletes). Responses carry a strong ETag per version and are publicly
+    cacheable for GAME_CATALOG_MAX_AGE seconds.
+    """
+
+    @read_replica()
+    def get(self, request):
+        since = request.GET.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response(
+                    {'error': 'since must be a catalog version (integer)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        version = catalog_version()
+        if since is not None and not 0 <= since <= version:
+            since = None  # A version this catalog never had: start over with a full download
+        etag = f'"catalog-{version}"' if since is None else f'"catalog-{since}-{version}"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f"public, max-age={getattr(settings, 'GAME_CATALOG_MAX_AGE', 60)}",
+        }
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        delta = catalog_delta(since, version) if since is not None else None
+        if delta is not None:
+            return Response(delta, headers=headers)
+        return HttpResponse(full_catalog(version), content_type='application/json', headers=headers)
+
+
+class ConceptStatsView(APIView):
+    """
+    API endpoint for per-concept accuracy and response-time stats, read from the daily rollups
+    """
+
+    @read_replica()
+    def get(self, request):
+        lang = request.GET.get('LANG')
+        if lang and lang not in ['ar', 'he', 'en']:
+            return Response(
+                {'error': 'Language must be one of "ar", "he" or "en"'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        dates = {}
+        for param in ('since', 'until'):
+            value = request.GET.get(param)
+            if value:
+                try:
+                    dates[param] = parse_date(value)
+                except ValueError:
+                    # Well-formed but impossible, e.g. February 30th
+                    dates[param] = None
+                if dates[param] is None:
+                    return Response(
+                        {'error': f'{param} must be a date (YYYY-MM-DD)'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+        return Response({
+            'results': cached_concept_stats(language=lang, concept=request.GET.get('concept'), **dates)
+        })
+
+
+class GameResponseListView(APIView):
+    """
+    Read-only, cursor-paginated API endpoint for game responses
+
+    Pages through one session (session_id, optionally within since/until)
+    ordered by (submitted_at, id) on the (session, submitted_at) index, or
+    through a time window alone in the same order on the (submitted_at, id)
+    index. Follow `next` for the
+    following page; unchanged pages are answered with 304 via ETags.
+    Anyone holding a session id may read that session; windows across all
+    sessions are for staff accounts (the analytics jobs) only.
+    """
+
+    @read_replica()
+    def get(self, request):
+        session_id = request.GET.get('session_id')
+        # Accept the signed token the game hands out as well as the raw session id
+        token = read_session_token(session_id) if session_id else None
+        if token is not None:
+            session_id = token[0]
+        window = {}
+        for param, lookup in (('since', 'submitted_at__gte'), ('until', 'submitted_at__lt')):
+            value = request.GET.get(param)
+            if value:
+                try:
+                    window[lookup] = parse_datetime(value)
+                except ValueError:
+                    # Well-formed but impossible, e.g. February 30th
+                    window[lookup] = None
+                if window[lookup] is None:
+                    return Response(
+                        {'error': f'{param} must be an ISO 8601 datetime'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+        if not session_id and not window:
+            return Response(
+                {'error': 'session_id or a since/until window is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not session_id and not IsAdminUser().has_permission(request, self):
+            return Response(
+                {'error': 'Listing responses across sessions requires a staff account'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        max_limit = getattr(settings, 'GAME_RESPONSES_PAGE_MAX', 500)
+        try:
+            limit = int(request.GET.get('limit', 100))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= max_limit:
+            return Response(
+                {'error': f'limit must be an integer between 1 and {max_limit}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Within a session the (session, submitted_at) index gives the order, across sessions (submitted_at, id)
+        queryset = GameResponse.objects.filter(**window).order_by('submitted_at', 'id')
+        if session_id:
+            queryset = queryset.filter(session__session_id=session_id)
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            position = decode_cursor(cursor)
+            position = parse_position(position) if position is not None else None
+            if position is None:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            submitted_at, last_id = position
+            queryset = queryset.filter(
+                Q(submitted_at__gt=submitted_at) | Q(submitted_at=submitted_at, id__gt=last_id)
+            )
+
+        # One extra row tells whether there is a next page
+        rows = list(queryset[:limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            params = request.GET.copy()
+            params['cursor'] = encode_cursor(response_position(rows[-1]))
+            next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+        data = {'results': GameResponseSerializer(rows, many=True).data, 'next': next_url}
+        etag = page_etag(data)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+
+def metrics_view(request):
+    """Metrics of all worker processes in the Prometheus text format"""
+    if not metrics_enabled():
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # Legacy function-based views (keep for backward compatibility if needed)
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryProfilingMiddleware',  # inactive unless REQUEST_PROFILING
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,13 +68,44 @@ WSGI_APPLICATION = 'simsim.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Applied by Django on every new connection. WAL lets readers run alongside the
+# single writer, busy_timeout makes writers wait for the lock instead of failing
+# and synchronous=NORMAL is durable enough under WAL. IMMEDIATE transactions take
+# the write lock up front, so the busy timeout applies instead of a mid-transaction
+# "database is locked".
+SQLITE_OPTIONS = {
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+    'timeout': 20,  # seconds, sets busy_timeout
+    'transaction_mode': 'IMMEDIATE',
+}
+
+# Keep connections open between requests (WSGI threads); 0 closes them after each request
+CONN_MAX_AGE = int(os.environ.get('SIMSIM_CONN_MAX_AGE', 600))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    # Local read replica: a second SQLite file refreshed from the primary with
+    # `manage.py refresh_replica`. Point DATABASE_READ_ALIAS at it to use it.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('SIMSIM_REPLICA_DB', BASE_DIR / 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+    },
 }
 
+# Read-only code paths (core.routers.read_replica) query this alias; writes
+# always go to 'default'
+DATABASE_READ_ALIAS = os.environ.get('SIMSIM_READ_ALIAS', 'default')
+DATABASE_ROUTERS = ['core.routers.ReadWriteRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,3 +154,113 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # AUTH_USER_MODEL = 'users.User'
+
+# Shared cache for all workers (vocabulary version, decks, session mastery, game
+# data). core.caching keeps a bounded per-process LRU in front of it.
+# FileBasedCache has no atomic add()/incr(): the deck counters, version bumps
+# and recompute leases lock a file in LOCATION + '-locks' instead (POSIX only),
+# and plain get/set read-modify-writes (session mastery) can still lose an
+# update. Prefer memcached or redis when running many workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SIMSIM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'simsim-cache')),
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+# Tests run against a temporary cache directory instead (core/testing.py)
+TEST_RUNNER = 'core.testing.IsolatedTestRunner'
+GAME_CACHE_LOCAL_MAX_ENTRIES = 1000  # per process
+GAME_CACHE_LOCAL_TTL = 60  # seconds a value stays in the process before re-reading the shared tier
+GAME_CACHE_VERSION_TTL = 1  # seconds a namespace version is trusted locally (invalidation delay)
+GAME_CACHE_LOCK_TIMEOUT = 10  # seconds a request waits for another one's recompute
+GAME_STATS_CACHE_TIMEOUT = 300  # concept stats, also dropped by every rollup run
+
+# Game API
+# Questions are served from a process-local vocabulary snapshot that is
+# reloaded when the shared vocabulary version changes.
+GAME_SNAPSHOT_ENABLED = True
+GAME_SNAPSHOT_MAX_AGE = 300  # seconds, upper bound for a stale snapshot
+GAME_DISTRACTOR_MIN_POOL = 12  # candidates per text length before widening
+
+# Used when the snapshot is disabled: tables up to this size are sampled
+# exactly, larger ones by random ids (see core/sampling.py)
+GAME_SAMPLING_EXACT_THRESHOLD = 1000
+GAME_SAMPLING_MAX_ROUNDS = 4
+GAME_SAMPLING_DISTRACTOR_POOL = 200  # extra rows fetched to draw distractors from
+
+GAME_MAX_QUESTIONS = 50  # largest `N` accepted by /api/game/vocabulary/
+GAME_SUBMIT_MAX_RESPONSES = 100  # answers accepted in one submit
+GAME_RESPONSES_PAGE_MAX = 500  # largest `limit` accepted by /api/game/responses/
+
+# Optional write-behind mode for submits: answers are queued in-process and
+# written in batches by a background thread (see core/ingest.py)
+GAME_WRITE_BEHIND = False
+GAME_WRITE_BEHIND_MAX_QUEUE = 10000  # rows; submits wait, then get a 503 when full
+GAME_WRITE_BEHIND_PUT_TIMEOUT = 0.5  # seconds a submit waits for room
+GAME_WRITE_BEHIND_BATCH_SIZE = 500
+GAME_WRITE_BEHIND_INTERVAL = 1.0  # seconds between flushes
+
+# 'db' creates a GameSession row per new player on GET; 'signed' hands out an
+# HMAC-signed token instead and creates the row lazily on the first submit
+GAME_SESSION_MODE = 'db'
+GAME_SESSION_TOKEN_MAX_AGE = 7 * 24 * 3600  # seconds
+GAME_SESSION_TTL_HOURS = 24  # `manage.py purge_sessions` deletes older sessions that never answered
+
+# Serve pre-generated question decks from the cache when available; fill the
+# pool with `manage.py generate_decks` (needs a cache shared between processes)
+GAME_DECKS_ENABLED = False
+GAME_DECK_TIMEOUT = 24 * 3600  # seconds
+
+# Serve /api/game/vocabulary/ and /api/game/submit/ with the async-native views
+# (core/async_views.py); they are always available under /api/game/async/ too
+GAME_API_ASYNC = False
+
+# /api/game/catalog/ lets clients download the vocabulary and then fetch
+# `?since=<version>` deltas from the CatalogChange log
+GAME_CATALOG_MAX_AGE = 60  # seconds, Cache-Control max-age for proxies and clients
+GAME_CATALOG_CACHE_TIMEOUT = 3600  # seconds a rendered full catalog stays cached
+GAME_CATALOG_DELTA_MAX = 5000  # changed entries above which a full catalog is sent instead
+
+# 'adaptive' favours concepts a session missed or answered slowly, using a
+# small per-session Leitner box map kept in the cache (see core/mastery.py)
+GAME_SELECTION_MODE = 'random'
+GAME_ADAPTIVE_SLOW_MS = 4000  # correct answers slower than this are not promoted
+GAME_ADAPTIVE_REVIEW_RATIO = 0.6  # share of a round drawn from concepts due for review
+GAME_ADAPTIVE_MAX_CONCEPTS = 200  # concepts remembered per session
+GAME_ADAPTIVE_TIMEOUT = 30 * 24 * 3600  # seconds
+
+# Per-request query count, DB time, view time and response size as a
+# Server-Timing header and a JSON line on the 'core.profiling' logger, with
+# repeated queries flagged (see core/middleware.py)
+REQUEST_PROFILING = os.environ.get('SIMSIM_REQUEST_PROFILING') == '1'
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('SIMSIM_REQUEST_PROFILING_SAMPLE_RATE', '1.0'))
+REQUEST_PROFILING_SIMILAR_THRESHOLD = 3  # same statement with different parameters this often is flagged
+REQUEST_PROFILING_HEADER = True  # send Server-Timing; turn off to only log
+
+# Request, game and cache metrics at /api/metrics/ in the Prometheus text
+# format. Worker processes share them through per-process mmap'd files in
+# METRICS_DIR; empty it on deploy, before the workers start (see core/metrics.py).
+# Scrape it from inside the network; it is not authenticated. Off unless a
+# directory is given, so commands and test runs never write into a server's.
+METRICS_DIR = os.environ.get('SIMSIM_METRICS_DIR')
+METRICS_ENABLED = bool(METRICS_DIR)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Rows fetched per database round trip by the streaming admin CSV exports
+ADMIN_EXPORT_CHUNK_SIZE = 2000
+VOCABULARY_IMPORT_CHUNK_SIZE = 500  # CSV rows validated and upserted together
+
+# Where `manage.py archive_responses` writes monthly GameResponse archives
+RESPONSE_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')